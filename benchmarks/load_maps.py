@@ -0,0 +1,89 @@
+import os
+import sys
+import glob
+import json
+import time
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+os.chdir(os.path.join(os.path.dirname(__file__), '..'))
+
+import pygame
+
+import scripts.pygpen as pp
+from scripts.pygpen.tiles.tilemap import tile_from_data
+from scripts.pygpen.utils.io import read_f
+
+RUNS = 10
+
+def best(func):
+    times = []
+    for i in range(RUNS):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times) * 1000
+
+# the loader before insert_many() existed. kept here as the baseline.
+def legacy_tjson_hook(obj):
+    if type(obj) == dict:
+        for key in list(obj):
+            if (type(key) == str) and (key.translate({ord(k): None for k in ' (),t\0'}).isalnum()) and (key.find(',') != -1) and (key[:2] == 't\0'):
+                new_key = tuple(int(v) for v in key.translate({ord(k): None for k in ' ()t\0'}).split(','))
+                obj[new_key] = obj[key]
+                del obj[key]
+    return obj
+
+def legacy_insert(tilemap, tile, ongrid=True, autotile=True):
+    tile.attach(tilemap, ongrid=ongrid)
+    dimensions_r = pygame.Rect(0, 0, *tilemap.dimensions)
+    if ongrid:
+        if tilemap.demensional_lock and (not dimensions_r.collidepoint(tile.grid_pos)):
+            return
+        if tile.grid_pos not in tilemap.grid_tiles:
+            tilemap.grid_tiles[tile.grid_pos] = {}
+        tilemap.grid_tiles[tile.grid_pos][tile.layer] = tile
+        tilemap.invalidate(tile.grid_pos)
+        if autotile:
+            tilemap.mark_autotile(tile.grid_pos, [tile.layer])
+        if tile.physics_type:
+            if tile.grid_pos not in tilemap.physics_map:
+                tilemap.physics_map[tile.grid_pos] = []
+            tilemap.physics_map[tile.grid_pos].append((tilemap.physics_priority[tile.physics_type], tilemap.i, tile))
+            tilemap.physics_map[tile.grid_pos].sort(reverse=True)
+            tilemap.i += 1
+            tilemap.sync_physics(tile.grid_pos)
+    else:
+        pos = (tile.raw_pos[0] / tilemap.tile_size[0], tile.raw_pos[1] / tilemap.tile_size[1])
+        if tilemap.demensional_lock and (not dimensions_r.collidepoint(pos)):
+            return
+        tilemap.offgrid_tiles.add_raw(tile, tile.rect, tag=True)
+    return True
+
+def legacy_load(tilemap, path):
+    data = json.loads(read_f(path), object_hook=legacy_tjson_hook)
+    tilemap.reset()
+    tilemap.tile_size = tuple(data['tile_size'])
+    tilemap.dimensions = tuple(data['dimensions'])
+    if tilemap.dense_physics:
+        tilemap.build_physics_grid()
+    for loc in data['grid_tiles']:
+        for layer in data['grid_tiles'][loc]:
+            legacy_insert(tilemap, tile_from_data(data['grid_tiles'][loc][layer]), autotile=False)
+    for tile_data in data['offgrid_tiles']['objects'].values():
+        legacy_insert(tilemap, tile_from_data(tile_data), ongrid=False)
+
+if __name__ == '__main__':
+    pp.init((320, 210), spritesheet_path='data/images/spritesheets')
+    pp.elems['Assets'].enable('foliage')
+    tilemap = pp.Tilemap()
+
+    print(f"{'map':<14}{'tiles':>8}{'legacy':>12}{'load':>12}")
+    for path in sorted(glob.glob('data/maps/test_*.pmap')):
+        tilemap.load(path)
+        count = sum(len(layers) for layers in tilemap.grid_tiles.values()) + len(tilemap.offgrid_tiles.objects)
+        legacy = best(lambda: legacy_load(tilemap, path))
+        batched = best(lambda: tilemap.load(path))
+        print(f"{os.path.basename(path):<14}{count:>8}{legacy:>10.1f}ms{batched:>10.1f}ms")
@@ -24,21 +24,30 @@ class Game(pp.PygpenGame):
             input_path='data/config/key_mappings.json',
             font_path='data/fonts',
             opengl=True,
-            frag_path='data/shaders/frag.frag'
+            gpu_renderer=True,
+            atlas=True,
+            asset_cache='.pygpen_cache',
+            parallel_load=True
         )
         
         self.display = pygame.Surface((320, 210))
+        
+        # the firefly glow gets a half resolution bloom that's added onto the surface before the main shader
+        self.post = self.e['MGL'].pipeline(self.display.get_size())
+        self.post.add_bloom('bloom', source='surface', threshold=0.5, composite='lit', strength=0.6)
+        self.post.add_pass('final', frag_path='data/shaders/frag.frag', inputs={'surface': 'lit'}, output=True)
+        self.post.set_static('noise_tex')
+        self.e['Window'].render_object = self.post
         self.ui_surf = pygame.Surface((320, 210), pygame.SRCALPHA)
         
         HUD()
         
         self.e['Assets'].enable('foliage')
-        self.e['Assets'].load_folder('data/images/background', colorkey=(0, 0, 0))
-        self.e['Assets'].load_folder('data/images/misc', colorkey=(0, 0, 0))
-        self.e['Assets'].load_folder('data/images/maps', colorkey=(0, 0, 0))
-        self.e['Assets'].load_folder('data/images/items', colorkey=(0, 0, 0))
-        self.e['Assets'].load_folder('data/images/portraits', colorkey=(0, 0, 0))
+        self.e['Assets'].load_folders(['data/images/background', 'data/images/misc'], colorkey=(0, 0, 0))
+        # only loaded once they're shown
+        self.e['Assets'].load_folders(['data/images/maps', 'data/images/items', 'data/images/portraits'], colorkey=(0, 0, 0), lazy=True)
         self.e['Renderer'].set_groups(['default', 'ui'])
+        self.e['Renderer'].set_blend_mode(107, pygame.BLEND_RGBA_ADD)
         
         self.noise_tex = self.e['MGL'].pg2tx(self.e['Assets'].images['misc']['noise'])
         self.glow_img = pygame.Surface((255, 255))
@@ -112,12 +121,13 @@ class Game(pp.PygpenGame):
         
         self.e['Renderer'].renderf(self.gm.update_render, self.e['Window'].dt, offset=self.camera, rot_function=lambda x, y: int((math.sin(x / 100 + time.time() * 1.5) - 0.7) * 30) / 10, z=-5)
             
-        self.e['Renderer'].cycle({'default': self.display, 'ui': self.ui_surf})
+        # surfaces with the CPU renderer or textures with the GPU renderer
+        targets = self.e['Renderer'].cycle({'default': self.display, 'ui': self.ui_surf})
         
         if self.e['Input'].pressed('quit'):
             pygame.quit()
             sys.exit()
 
-        self.e['Window'].cycle({'surface': self.display, 'ui_surf': self.ui_surf, 'noise_tex': self.noise_tex, 'time': int((self.e['Window'].time - self.e['Window'].start_time) * 100), 'camera': tuple(list(self.camera))})
+        self.e['Window'].cycle({'surface': targets['default'], 'ui_surf': targets['ui'], 'noise_tex': self.noise_tex, 'time': int((self.e['Window'].time - self.e['Window'].start_time) * 100), 'camera': tuple(list(self.camera))})
         
 Game().run()
\ No newline at end of file
@@ -1,5 +1,7 @@
 import math
 
+import numpy as np
+
 from . import pygpen as pp
 
 @pp.vfx.particle_init('dirt')
@@ -11,10 +13,18 @@ def dirt_particle_init(self):
 def dirt_particle_behave(self, dt):
     pass
 
+@pp.vfx.particle_batch_behavior('dirt')
+def dirt_particle_batch_behave(system, dt):
+    pass
+
 @pp.vfx.particle_init('grass')
 def grass_particle_init(self):
     self.time = self.e['Window'].time
 
 @pp.vfx.particle_behavior('grass')
 def grass_particle_behave(self, dt):
-    self.pos[0] += math.sin(self.e['Window'].time * 2 + self.time) * dt * 30
\ No newline at end of file
+    self.pos[0] += math.sin(self.e['Window'].time * 2 + self.time) * dt * 30
+
+@pp.vfx.particle_batch_behavior('grass')
+def grass_particle_batch_behave(system, dt):
+    system.pos[:, 0] += np.sin(system.e['Window'].time * 2 + system.data['time']) * dt * 30
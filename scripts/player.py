@@ -18,6 +18,9 @@ class Player(pp.PhysicsEntity):
         self.target_rot = 0
         self.digging = 0
         
+        self.dirt_particles = pp.vfx.ParticleSystem('particle', behavior='dirt', colors={(255, 255, 255): (135, 53, 85)}, physics_source=self.e['Game'].tilemap)
+        self.e['EntityGroups'].add(self.dirt_particles, 'particles')
+        
     def update(self, *args, **kwargs):
         super().update(*args, **kwargs)
         
@@ -29,8 +32,7 @@ class Player(pp.PhysicsEntity):
             if self.e['Window'].dt > random.random() * 0.1:
                 angle = -math.pi * (0.5 * random.random() + 0.25)
                 force = random.random() * 50 + 50
-                particle = pp.vfx.Particle((self.center[0], self.center[1] + 4), 'particle', decay_rate=0.25, advance=random.random() * 0.3 + 0.3, velocity=[math.cos(angle) * force, math.sin(angle) * force], behavior='dirt', colors={(255, 255, 255): (135, 53, 85)}, physics_source=self.e['Game'].tilemap)
-                self.e['EntityGroups'].add(particle, 'particles')
+                self.dirt_particles.add((self.center[0], self.center[1] + 4), velocity=[math.cos(angle) * force, math.sin(angle) * force], decay_rate=0.25, advance=random.random() * 0.3 + 0.3)
                 self.e['Sounds'].play('dig')
         
         self.rotation = pp.utils.game_math.normalize(self.rotation, self.e['Window'].dt * 1440, self.target_rot)
@@ -40,15 +42,14 @@ class Player(pp.PhysicsEntity):
             
             v = -1 if self.flip[0] else 1
             if self.next_movement[0] * v < 0:
-                anim = Animation('turn_anim', self.pos)
+                anim = self.e['EntityGroups'].spawn(Animation, 'entities', 'turn_anim', self.pos)
                 if self.next_movement[0] < 0:
                     anim.flip[0] = True
-                self.e['EntityGroups'].add(anim, 'entities')
             
             if self.e['Input'].pressed('up'):
                 if self.jumps > 0:
                     self.e['HUD'].tutorial = False
-                    self.e['EntityGroups'].add(Animation('jump_anim', self.pos), 'entities')
+                    self.e['EntityGroups'].spawn(Animation, 'entities', 'jump_anim', self.pos)
                     self.e['Sounds'].play('jump')
                     if self.jumps == 2:
                         self.velocity[1] = -160
@@ -84,7 +85,7 @@ class Player(pp.PhysicsEntity):
         
         if self.collide_directions['down']:
             if self.air_time > 0.5:
-                self.e['EntityGroups'].add(Animation('land_anim', self.pos), 'entities')
+                self.e['EntityGroups'].spawn(Animation, 'entities', 'land_anim', self.pos)
                 self.e['Sounds'].play('land', volume=0.5)
             self.air_time = 0
             self.jumps = 2
@@ -6,14 +6,19 @@ from .utils.elements import elems, Element, ElementSingleton
 from .utils import gfx as gfx_util
 from .utils import io as io
 from .assets.assets import Assets
+from .assets.cache import AssetCache
+from .assets.loader import AssetLoader
+from .assets.lazy import AssetBudget
 from .entities.entity import Entity, PhysicsEntity
 from .entities.entity_db import EntityDB
 from .entities.entity_groups import EntityGroups
 from .misc.game import PygpenGame
 from .misc.window import Window
+from .mgl.pipeline import PostPipeline
 from .misc.camera import Camera
 from .misc.input import Input
 from .rendering.renderer import Renderer
+from .rendering.gpu_renderer import GPURenderer
 from .sound.sounds import Sounds
 from .tiles.tilemap import Tilemap, Tile
 from .ui.text import Text
@@ -22,14 +27,34 @@ from .ui.textbox import Textbox
 def init(dimensions=(640, 480), caption='pygpen window', entity_path=None,
          sounds_path=None, spritesheet_path=None, input_path=None,
          font_path=None, flags=0, fps_cap=60, dt_cap=1,
-         opengl=False, frag_path=None):
-    window = Window(dimensions=dimensions, caption=caption, flags=flags, fps_cap=fps_cap, dt_cap=dt_cap, opengl=opengl, frag_path=frag_path)
+         opengl=False, frag_path=None, physics_hz=None, gpu_renderer=False,
+         atlas=False, asset_cache=None, parallel_load=False, load_progress=None,
+         lazy_assets=False, asset_budget=None):
+    window = Window(dimensions=dimensions, caption=caption, flags=flags, fps_cap=fps_cap, dt_cap=dt_cap, opengl=opengl, frag_path=frag_path, physics_hz=physics_hz)
+    if asset_cache:
+        cache = AssetCache(path=asset_cache)
+    if asset_budget:
+        budget = AssetBudget(asset_budget)
+    if parallel_load:
+        loader = AssetLoader(progress=load_progress)
+        # queued in the order they're loaded below. cached assets are only decoded on a cache miss, so they're left alone when the cache is enabled.
+        # lazy assets are only decoded when they're first used.
+        prefetch = [(entity_path, 'png'), (sounds_path, 'wav')] if not lazy_assets else []
+        if not asset_cache:
+            prefetch += [(spritesheet_path, 'png'), (font_path, 'png')]
+        for path, filetype in prefetch:
+            if path:
+                loader.prefetch(path, filetype=filetype)
     entity_groups = EntityGroups()
-    entity_db = EntityDB(path=entity_path)
-    renderer = Renderer()
-    sounds = Sounds(path=sounds_path)
-    assets = Assets(spritesheet_path=spritesheet_path)
+    entity_db = EntityDB(path=entity_path, lazy=lazy_assets)
+    renderer = GPURenderer() if (opengl and gpu_renderer) else Renderer()
+    sounds = Sounds(path=sounds_path, lazy=lazy_assets)
+    assets = Assets(spritesheet_path=spritesheet_path, lazy=lazy_assets)
     input = Input(path=input_path)
     text = Text(path=font_path)
+    if parallel_load:
+        loader.finish()
+    if atlas:
+        assets.build_atlas()
 
 elements = elems
\ No newline at end of file
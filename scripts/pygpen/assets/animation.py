@@ -33,6 +33,12 @@ class Animation:
     def hard_copy(self):
         return Animation(self.images, config=self.config, hard_copy=True)
     
+    def reset(self):
+        self.frame = 0
+        self.frame_time = 0
+        self.paused = self.config['paused']
+        self.finished = False
+    
     @property
     def img(self):
         return self.images[max(min(len(self.images) - 1, self.frame), 0)]
@@ -1,15 +1,20 @@
 import pygame
 
 from ..utils.io import recursive_file_op
+from .loader import loaded
+from .lazy import lazy_file_op
 
 def load_img(path, alpha=False, colorkey=None):
     if alpha:
-        img = pygame.image.load(path).convert_alpha()
+        img = loaded(path, pygame.image.load).convert_alpha()
     else:
-        img = pygame.image.load(path).convert()
+        img = loaded(path, pygame.image.load).convert()
     if colorkey:
         img.set_colorkey(colorkey)
     return img
 
 def load_img_directory(path, alpha=False, colorkey=None):
-    return recursive_file_op(path, lambda x: load_img(x, alpha=alpha, colorkey=colorkey), filetype='png')
\ No newline at end of file
+    return recursive_file_op(path, lambda x: load_img(x, alpha=alpha, colorkey=colorkey), filetype='png')
+
+def lazy_img_directory(path, alpha=False, colorkey=None):
+    return lazy_file_op(path, lambda x: load_img(x, alpha=alpha, colorkey=colorkey), filetype='png')
\ No newline at end of file
@@ -1,14 +1,20 @@
+import pygame
+
 from ..utils.io import read_tjson
 from ..utils.elements import ElementSingleton
 from ..ui.boxer import UIBoxer
 from ..vfx.foliage import FoliageAssets
 from ..vfx.water import WaterManager
 from .spritesheets import load_spritesheets
-from .asset_utils import load_img_directory
+from ..tiles.autotile import compile_mapping
+from .asset_utils import load_img_directory, lazy_img_directory
+from .atlas import TextureAtlas
+from .lazy import LazyDict
 
 class Assets(ElementSingleton):
-    def __init__(self, spritesheet_path=None, colorkey=(0, 0, 0)):
+    def __init__(self, spritesheet_path=None, colorkey=(0, 0, 0), lazy=False):
         super().__init__()
+        self.lazy = lazy
         self.spritesheet_path = spritesheet_path
         self.spritesheets = load_spritesheets(spritesheet_path, colorkey=colorkey) if spritesheet_path else {}
         self.autotile_config = self.parse_autotile_config(read_tjson(spritesheet_path + '/autotile.json')) if spritesheet_path else {}
@@ -18,9 +24,95 @@ class Assets(ElementSingleton):
         self.foliage.load()
         self.custom_tile_renderers = {}
         self.images = {}
+        self.tile_masks = {}
+        self.tile_types = {}
+        self.atlas = None
         
-    def load_folder(self, path, alpha=False, colorkey=None):
+    # lazy folders only index their files here and load each image on its first lookup (defaults to the Assets' lazy setting)
+    def load_folder(self, path, alpha=False, colorkey=None, lazy=None):
+        if self.lazy if lazy == None else lazy:
+            self.images[path.split('/')[-1]] = lazy_img_directory(path, alpha=alpha, colorkey=colorkey)
+            if self.atlas:
+                folder = path.split('/')[-1]
+                self.atlas_lazy(self.images[folder], lambda source, img: self.atlas.add(('images', folder, source), img))
+            return
         self.images[path.split('/')[-1]] = load_img_directory(path, alpha=alpha, colorkey=colorkey)
+        if self.atlas:
+            self.images[path.split('/')[-1]] = self.atlas_tree(self.images[path.split('/')[-1]], ('images', path.split('/')[-1]))
+
+    # same as calling load_folder() for each path, but the files of every folder are decoded in parallel if the AssetLoader is enabled
+    def load_folders(self, paths, alpha=False, colorkey=None, lazy=None):
+        if ('AssetLoader' in self.e) and not (self.lazy if lazy == None else lazy):
+            for path in paths:
+                self.e['AssetLoader'].prefetch(path)
+        for path in paths:
+            self.load_folder(path, alpha=alpha, colorkey=colorkey, lazy=lazy)
+        if 'AssetLoader' in self.e:
+            self.e['AssetLoader'].finish()
+    
+    # swaps the surfaces in a nested dict for atlas subsurfaces. returns the new tree and fills replaced with old surface IDs -> subsurfaces.
+    def atlas_tree(self, tree, key, replaced=None):
+        surfaces = {}
+        def collect(node, path):
+            for k, v in node.items():
+                if type(v) == pygame.Surface:
+                    surfaces[path + (k,)] = v
+                elif type(v) == dict:
+                    collect(v, path + (k,))
+        collect(tree, key)
+        packed = self.atlas.add_many(surfaces)
+        if replaced != None:
+            for path, surf in surfaces.items():
+                replaced[id(surf)] = packed[path]
+        def rebuild(node, path):
+            return {k: (packed[path + (k,)] if type(v) == pygame.Surface else (rebuild(v, path + (k,)) if type(v) == dict else v)) for k, v in node.items()}
+        return rebuild(tree, key)
+    
+    # packs the entries of a LazyDict (and the LazyDicts nested in it) with pack(source, value) as they're loaded.
+    # entries that are already loaded are packed right away.
+    def atlas_lazy(self, lazy_dict, pack):
+        lazy_dict.after_load = pack
+        for k, v in lazy_dict.loaded.items():
+            if type(v) == LazyDict:
+                self.atlas_lazy(v, pack)
+            elif lazy_dict.sources[k] != None:
+                lazy_dict.loaded[k] = pack(lazy_dict.sources[k], v)
+    
+    def atlas_entity(self, entity_data, key):
+        replaced = {}
+        entity_data.assets = self.atlas_tree(entity_data.assets, key, replaced)
+        for animation in entity_data.animations.values():
+            animation.images = [replaced[id(img)] if id(img) in replaced else img for img in animation.images]
+        return entity_data
+    
+    # packs spritesheet tiles, entity images and animation frames and font glyphs into shared pages.
+    # the existing lookups keep working and return subsurfaces of the pages (or UVs through the atlas with MGL).
+    def build_atlas(self, page_size=(1024, 1024)):
+        self.atlas = TextureAtlas(page_size=page_size)
+        for sheet_id, sheet in self.spritesheets.items():
+            sheet['assets'] = self.atlas_tree(sheet['assets'], ('spritesheets', sheet_id))
+        if 'EntityDB' in self.e:
+            configs = self.e['EntityDB'].configs
+            if type(configs) == LazyDict:
+                # lazy entity types are packed when they're loaded so that building the atlas doesn't load all of them
+                self.atlas_lazy(configs, lambda config, entity_data: self.atlas_entity(entity_data, ('entities', config['id'])))
+            else:
+                for entity_id, entity_data in configs.items():
+                    self.atlas_entity(entity_data, ('entities', entity_id))
+        if 'Text' in self.e:
+            fonts = {}
+            def collect(node, path):
+                for k, v in node.items():
+                    if type(v) == dict:
+                        collect(v, path + (k,))
+                    else:
+                        fonts[path + (k,)] = v
+            collect(self.e['Text'].fonts, ('fonts',))
+            for path, font in fonts.items():
+                letters = self.atlas.add_many({path + (i,): letter for i, letter in enumerate(font.letters)})
+                font.letters[:] = [letters[path + (i,)] for i in range(len(font.letters))]
+        self.tile_types = {}
+        return self.atlas
     
     def enable(self, *args, **kwargs):
         if 'foliage' in args:
@@ -30,7 +122,15 @@ class Assets(ElementSingleton):
         if ('water' in args) and ('water_group' in kwargs):
             spacing = kwargs['water_spacing'] if 'water_spacing' in kwargs else 2
             self.custom_tile_renderers.update(self.water.render_functions(kwargs['water_group'], spacing=spacing))
+        # tiles created from here on should pick up the new renderers
+        self.tile_types = {}
 
+    def tile_mask(self, group, tile_id):
+        if (group, tile_id) not in self.tile_masks:
+            mask = pygame.mask.from_surface(self.spritesheets[group]['assets'][tile_id])
+            self.tile_masks[(group, tile_id)] = (mask, mask.count())
+        return self.tile_masks[(group, tile_id)]
+    
     def parse_autotile_config(self, config):
         checks = {}
         for mapping in config['mappings']:
@@ -41,4 +141,5 @@ class Assets(ElementSingleton):
                         checks[mapping].append(tuple(check[:2]))
             checks[mapping] = list(set(checks[mapping]))
         config['checks'] = checks
+        config['tables'] = {mapping: compile_mapping(config['mappings'][mapping], checks[mapping]) for mapping in config['mappings']}
         return config
\ No newline at end of file
@@ -0,0 +1,156 @@
+import moderngl
+import pygame
+
+from ..utils.elements import elems
+from ..utils.gfx import surface_rgba
+
+# packs rectangles into rows of a fixed size page
+class ShelfPacker:
+    def __init__(self, size, padding=1):
+        self.size = size
+        self.padding = padding
+        self.reset()
+
+    def reset(self):
+        # [y, height, next x]
+        self.shelves = []
+        self.top = 0
+
+    def pack(self, size):
+        w = size[0] + self.padding
+        h = size[1] + self.padding
+        for shelf in self.shelves:
+            if (h <= shelf[1]) and (shelf[2] + w <= self.size[0]):
+                pos = (shelf[2], shelf[0])
+                shelf[2] += w
+                return pos
+        if (self.top + h <= self.size[1]) and (w <= self.size[0]):
+            self.shelves.append([self.top, h, w])
+            pos = (0, self.top)
+            self.top += h
+            return pos
+        return None
+
+class AtlasPage:
+    def __init__(self, size, surf):
+        self.format = surface_format(surf)
+        if surf.get_flags() & pygame.SRCALPHA:
+            self.surf = pygame.Surface(size, pygame.SRCALPHA, surf)
+            self.surf.fill((0, 0, 0, 0))
+        else:
+            self.surf = pygame.Surface(size, 0, surf)
+            colorkey = surf.get_colorkey()
+            if colorkey:
+                self.surf.fill(colorkey)
+                self.surf.set_colorkey(colorkey)
+        self.packer = ShelfPacker(size)
+
+    def add(self, surf):
+        pos = self.packer.pack(surf.get_size())
+        if not pos:
+            return None
+        return self.write(surf, pos)
+
+    def write(self, surf, pos):
+        rect = pygame.Rect(pos, surf.get_size())
+        if surf.get_flags() & pygame.SRCALPHA:
+            # adding onto the cleared area copies the pixels exactly
+            self.surf.fill((0, 0, 0, 0), rect)
+            self.surf.blit(surf, pos, special_flags=pygame.BLEND_RGBA_ADD)
+        else:
+            # colorkeyed pixels are skipped, so the area is filled with the colorkey first
+            if self.surf.get_colorkey():
+                self.surf.fill(self.surf.get_colorkey(), rect)
+            self.surf.blit(surf, pos)
+        return rect
+
+# surfaces can only share a page if a subsurface of the page renders the same way
+def surface_format(surf):
+    return (surf.get_bitsize(), surf.get_masks(), bool(surf.get_flags() & pygame.SRCALPHA), surf.get_colorkey())
+
+# bins many small surfaces into a few large pages. the surfaces handed back are subsurfaces of the pages.
+class TextureAtlas:
+    def __init__(self, page_size=(1024, 1024)):
+        self.page_size = page_size
+        self.pages = []
+        # key -> (page index, rect)
+        self.regions = {}
+        self.textures = None
+        # bumped whenever a page is added
+        self.version = 0
+
+    def __len__(self):
+        return len(self.regions)
+
+    def add(self, key, surf):
+        # surfaces with surface level alpha can't be represented by a subsurface of a shared page
+        if surf.get_alpha() not in {None, 255}:
+            return surf
+        surf_format = surface_format(surf)
+        # surfaces that are added again under the same key (like reloaded lazy assets) reuse their region.
+        # the pages stay the same, so only the region is rewritten in the page's texture.
+        if key in self.regions:
+            page_index, rect = self.regions[key]
+            page = self.pages[page_index]
+            if (page.format == surf_format) and (rect.size == surf.get_size()):
+                page.write(surf, rect.topleft)
+                self.update_texture(page_index, rect)
+                return page.surf.subsurface(rect)
+        for i, page in enumerate(self.pages):
+            if page.format == surf_format:
+                rect = page.add(surf)
+                if rect:
+                    self.regions[key] = (i, rect)
+                    self.update_texture(i, rect)
+                    return page.surf.subsurface(rect)
+        # the existing textures are kept and the new page's texture is created on the next lookup
+        self.version += 1
+        self.pages.append(AtlasPage((max(self.page_size[0], surf.get_width() + 1), max(self.page_size[1], surf.get_height() + 1)), surf))
+        rect = self.pages[-1].add(surf)
+        self.regions[key] = (len(self.pages) - 1, rect)
+        return self.pages[-1].surf.subsurface(rect)
+
+    # returns {key: subsurface}. surfaces are packed tallest first to keep the shelves tight.
+    def add_many(self, surfaces):
+        keys = sorted(surfaces, key=lambda k: (-surfaces[k].get_height(), -surfaces[k].get_width()))
+        return {key: self.add(key, surfaces[key]) for key in keys}
+
+    def region(self, key):
+        page_index, rect = self.regions[key]
+        return self.pages[page_index].surf, rect
+
+    def subsurface(self, key):
+        page_index, rect = self.regions[key]
+        return self.pages[page_index].surf.subsurface(rect)
+
+    # returns (texture, (u0, v0, u1, v1)). textures are created on the first lookup and require MGL.
+    def uv(self, key):
+        page_index, rect = self.regions[key]
+        page_size = self.pages[page_index].surf.get_size()
+        return self.page_textures()[page_index], (rect.left / page_size[0], rect.top / page_size[1], rect.right / page_size[0], rect.bottom / page_size[1])
+
+    # pages without a texture yet get the whole page uploaded when it's created
+    def update_texture(self, page_index, rect):
+        if self.textures and (page_index < len(self.textures)):
+            self.textures[page_index].write(surface_rgba(self.pages[page_index].surf.subsurface(rect)), viewport=(rect.x, rect.y, rect.width, rect.height))
+
+    def page_textures(self):
+        if not self.textures:
+            self.textures = []
+        for page in self.pages[len(self.textures):]:
+            self.textures.append(self.upload(page.surf))
+        return self.textures
+
+    def upload(self, surf):
+        tex = elems['MGL'].ctx.texture(surf.get_size(), 4, surface_rgba(surf))
+        tex.filter = (moderngl.NEAREST, moderngl.NEAREST)
+        return tex
+
+    def page_surfaces(self):
+        return [page.surf for page in self.pages]
+
+    def release(self):
+        if self.textures:
+            for tex in self.textures:
+                tex.release()
+        self.textures = None
@@ -0,0 +1,138 @@
+import os
+import mmap
+import hashlib
+
+import pygame
+
+from ..utils.elements import elems, ElementSingleton
+from ..utils.io import read_f, write_f, tjson_encode, tjson_decode, directory_files
+
+# bump when the stored layout or any of the cached processing changes
+CACHE_VERSION = 1
+
+def file_hash(path):
+    f = open(path, 'rb')
+    digest = hashlib.sha1(f.read()).hexdigest()
+    f.close()
+    return digest
+
+# returns build() or its cached result if the cache is enabled. the result may be any nesting of dicts, lists and tuples
+# with surfaces and json compatible values. sources are the files the result is derived from and params are any other inputs.
+def cached(name, sources, build, params=None):
+    if 'AssetCache' in elems:
+        return elems['AssetCache'].load(name, sources, build, params=params)
+    return build()
+
+# processed assets are stored as a json index and a blob of raw pixels per entry.
+# entries are invalidated when a source's size or hash changes. hashes are only checked for sources with a new mtime.
+class AssetCache(ElementSingleton):
+    def __init__(self, path='.pygpen_cache'):
+        super().__init__()
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(path, exist_ok=True)
+
+    def entry_path(self, name):
+        return self.path + '/' + hashlib.sha1(name.encode()).hexdigest()[:16]
+
+    def source_state(self, path):
+        stat = os.stat(path)
+        return [stat.st_mtime_ns, stat.st_size]
+
+    # returns the index if the entry is still valid. sources with a new mtime but unchanged contents are refreshed in the index.
+    def validate(self, name, sources, params):
+        index_path = self.entry_path(name) + '.json'
+        if not (os.path.isfile(index_path) and os.path.isfile(self.entry_path(name) + '.bin')):
+            return None
+        try:
+            index = tjson_decode(read_f(index_path))
+        except ValueError:
+            return None
+        if (index['version'] != CACHE_VERSION) or (index['name'] != name) or (index['params'] != tjson_decode(tjson_encode(params))):
+            return None
+        if sorted(index['sources']) != sorted(sources):
+            return None
+        touched = False
+        for source in sources:
+            state = self.source_state(source)
+            if state == index['sources'][source][:2]:
+                continue
+            if (state[1] != index['sources'][source][1]) or (file_hash(source) != index['sources'][source][2]):
+                return None
+            index['sources'][source][0] = state[0]
+            touched = True
+        if touched:
+            write_f(index_path, tjson_encode(index))
+        return index
+
+    def load(self, name, sources, build, params=None):
+        index = self.validate(name, sources, params)
+        if index:
+            self.hits += 1
+            return self.read(name, index)
+        self.misses += 1
+        # sources are checked before building so that a file changed mid-build is picked up by the next load
+        states = {source: self.source_state(source) + [file_hash(source)] for source in sources}
+        data = build()
+        self.write(name, states, params, data)
+        return data
+
+    def write(self, name, sources, params, data):
+        surfaces = []
+        blob = []
+        offset = [0]
+
+        def pack(obj):
+            if type(obj) == pygame.Surface:
+                alpha = bool(obj.get_flags() & pygame.SRCALPHA)
+                raw = pygame.image.tobytes(obj, 'RGBA' if alpha else 'RGB')
+                surfaces.append([offset[0], obj.get_width(), obj.get_height(), alpha, obj.get_colorkey()])
+                blob.append(raw)
+                offset[0] += len(raw)
+                return {'surface': len(surfaces) - 1}
+            if type(obj) == dict:
+                return {'dict': {k: pack(v) for k, v in obj.items()}}
+            if type(obj) in {list, tuple}:
+                return {'list': [pack(v) for v in obj], 'tuple': type(obj) == tuple}
+            return {'value': obj}
+
+        tree = pack(data)
+        f = open(self.entry_path(name) + '.bin', 'wb')
+        f.write(b''.join(blob))
+        f.close()
+        # the index is written last so that an interrupted write can't be mistaken for a valid entry
+        write_f(self.entry_path(name) + '.json', tjson_encode({'version': CACHE_VERSION, 'name': name, 'params': params, 'sources': sources, 'surfaces': surfaces, 'data': tree}))
+
+    def read(self, name, index):
+        f = open(self.entry_path(name) + '.bin', 'rb')
+        blob = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if os.fstat(f.fileno()).st_size else b''
+        surfaces = []
+        for offset, width, height, alpha, colorkey in index['surfaces']:
+            if alpha:
+                surf = pygame.image.frombytes(blob[offset:offset + width * height * 4], (width, height), 'RGBA').convert_alpha()
+            else:
+                surf = pygame.image.frombytes(blob[offset:offset + width * height * 3], (width, height), 'RGB').convert()
+            if colorkey:
+                surf.set_colorkey(colorkey)
+            surfaces.append(surf)
+        if blob:
+            blob.close()
+        f.close()
+
+        def unpack(obj):
+            if 'surface' in obj:
+                return surfaces[obj['surface']]
+            if 'list' in obj:
+                values = [unpack(v) for v in obj['list']]
+                return tuple(values) if obj['tuple'] else values
+            if 'dict' in obj:
+                return {k: unpack(v) for k, v in obj['dict'].items()}
+            return obj['value']
+
+        return unpack(index['data'])
+
+    def clear(self):
+        for f in os.listdir(self.path):
+            if f.split('.')[-1] in {'json', 'bin'}:
+                os.remove(self.path + '/' + f)
@@ -0,0 +1,138 @@
+import os
+from collections import OrderedDict
+from collections.abc import MutableMapping
+
+import pygame
+
+from ..utils.elements import elems, ElementSingleton
+
+def asset_size(value):
+    if type(value) == pygame.Surface:
+        return value.get_width() * value.get_height() * value.get_bytesize()
+    if type(value) == pygame.mixer.Sound:
+        freq, size, channels = pygame.mixer.get_init()
+        return int(value.get_length() * freq) * channels * abs(size) // 8
+    if type(value) == dict:
+        return sum(asset_size(v) for v in value.values())
+    if type(value) == LazyDict:
+        # only what's loaded counts
+        return sum(asset_size(v) for v in value.loaded.values())
+    if isinstance(value, (list, tuple)):
+        return sum(asset_size(v) for v in value)
+    if hasattr(value, 'resident_size'):
+        return value.resident_size()
+    return 0
+
+# a dict that maps keys to sources (usually file paths) and only loads an entry the first time it's looked up.
+# iterating over the keys doesn't load anything, but values() and items() do.
+class LazyDict(MutableMapping):
+    def __init__(self, load):
+        self.load = load
+        # after_load(source, value) can replace each value as it's loaded (or reloaded after being unloaded)
+        self.after_load = None
+        # key -> source. None for entries that were set directly.
+        self.sources = {}
+        self.loaded = {}
+
+    def add_source(self, key, source):
+        self.sources[key] = source
+        if key in self.loaded:
+            del self.loaded[key]
+
+    def __getitem__(self, key):
+        if key in self.loaded:
+            value = self.loaded[key]
+        else:
+            value = self.load(self.sources[key])
+            if self.after_load:
+                value = self.after_load(self.sources[key], value)
+            self.loaded[key] = value
+        if (self.sources[key] != None) and ('AssetBudget' in elems):
+            elems['AssetBudget'].touch(self, key, value)
+        return value
+
+    def __setitem__(self, key, value):
+        self.sources[key] = None
+        self.loaded[key] = value
+
+    def __delitem__(self, key):
+        del self.sources[key]
+        if key in self.loaded:
+            del self.loaded[key]
+
+    def __contains__(self, key):
+        return key in self.sources
+
+    def __iter__(self):
+        return iter(self.sources)
+
+    def __len__(self):
+        return len(self.sources)
+
+    def __repr__(self):
+        return '<LazyDict:' + str(len(self.loaded)) + '/' + str(len(self.sources)) + ' loaded>'
+
+    def is_loaded(self, key):
+        return key in self.loaded
+
+    # entries that were set directly can't be reloaded, so they're never unloaded
+    def unload(self, key):
+        if (key in self.loaded) and (self.sources[key] != None):
+            del self.loaded[key]
+
+    # hints that keys (all if None) will be needed soon. file sources are decoded in the background if the AssetLoader is enabled.
+    def prefetch(self, keys=None):
+        for key in (keys if keys != None else list(self.sources)):
+            if (key in self.loaded) or (self.sources[key] == None):
+                continue
+            if not (('AssetLoader' in elems) and (type(self.sources[key]) == str) and elems['AssetLoader'].prefetch_file(self.sources[key])):
+                self[key]
+
+# the lazy version of recursive_file_op(). directories become nested LazyDicts that are created up front.
+def lazy_file_op(path, func, filetype=None):
+    data = LazyDict(func)
+    base_path = path.split('/')
+    for f in os.walk(path):
+        wpath = f[0].replace('\\', '/').split('/')
+        path_ref = wpath.copy()
+        data_ref = data
+
+        while len(path_ref) > len(base_path):
+            current_dir = path_ref[len(base_path)]
+            if current_dir not in data_ref:
+                data_ref[current_dir] = LazyDict(func)
+            data_ref = data_ref[current_dir]
+            path_ref.pop(len(base_path))
+
+        for asset in f[2]:
+            asset_type = asset.split('.')[-1]
+            if (asset_type == filetype) or (filetype == None):
+                data_ref.add_source(asset.split('.')[0], f[0] + '/' + asset)
+
+    return data
+
+# unloads the least recently used LazyDict entries once the loaded entries go over budget bytes (estimated with asset_size()).
+# anything else holding on to an unloaded asset keeps it alive, and looking the entry up again reloads it.
+class AssetBudget(ElementSingleton):
+    def __init__(self, budget):
+        super().__init__()
+        self.budget = budget
+        # (dict id, key) -> (dict, key, size)
+        self.resident = OrderedDict()
+        self.total = 0
+        self.evictions = 0
+
+    def touch(self, lazy_dict, key, value):
+        resident_id = (id(lazy_dict), key)
+        if resident_id in self.resident:
+            self.resident.move_to_end(resident_id)
+            return
+        size = asset_size(value)
+        self.resident[resident_id] = (lazy_dict, key, size)
+        self.total += size
+        # the entry that was just looked up always stays
+        while (self.total > self.budget) and (len(self.resident) > 1):
+            evicted = self.resident.popitem(last=False)[1]
+            evicted[0].unload(evicted[1])
+            self.total -= evicted[2]
+            self.evictions += 1
@@ -0,0 +1,75 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pygame
+
+from ..utils.elements import elems, ElementSingleton
+from ..utils.io import directory_files
+
+# decoding doesn't touch the display, so it's safe off the main thread (and pygame releases the GIL while decoding)
+DECODERS = {
+    'png': pygame.image.load,
+    'jpg': pygame.image.load,
+    'wav': pygame.mixer.Sound,
+    'ogg': pygame.mixer.Sound,
+    'mp3': pygame.mixer.Sound,
+}
+
+# returns the prefetched result for path if the loader is enabled and has it, otherwise decodes it directly
+def loaded(path, decode):
+    if 'AssetLoader' in elems:
+        return elems['AssetLoader'].get(path, decode)
+    return decode(path)
+
+# decodes files on a thread pool ahead of the (sequential) loading code, which picks them up through loaded().
+# surfaces still get converted by the loading code on the main thread. progress(done, total) is called on the main thread
+# as prefetched files are picked up, so it can be used to draw a loading screen.
+class AssetLoader(ElementSingleton):
+    def __init__(self, workers=None, progress=None):
+        super().__init__()
+        self.pool = ThreadPoolExecutor(max_workers=workers if workers else os.cpu_count())
+        self.progress = progress
+        self.pending = {}
+        self.done = 0
+        self.total = 0
+
+    def prefetch(self, path, filetype='png'):
+        if not os.path.isdir(path):
+            return
+        for file in directory_files(path, filetype=filetype):
+            self.prefetch_file(file)
+
+    # returns False if there's no decoder for the file's type
+    def prefetch_file(self, path):
+        path = path.replace('\\', '/')
+        filetype = path.split('.')[-1]
+        if filetype not in DECODERS:
+            return False
+        if path not in self.pending:
+            # sounds can't be decoded before the mixer is up. Sounds initializes it with the same defaults.
+            if (DECODERS[filetype] == pygame.mixer.Sound) and (not pygame.mixer.get_init()):
+                pygame.mixer.init()
+            self.pending[path] = self.pool.submit(DECODERS[filetype], path)
+            self.total += 1
+        return True
+
+    def get(self, path, decode):
+        path = path.replace('\\', '/')
+        if path not in self.pending:
+            return decode(path)
+        result = self.pending.pop(path).result()
+        self.done += 1
+        if self.progress:
+            self.progress(self.done, self.total)
+        return result
+
+    # drops prefetched files that weren't used
+    def finish(self):
+        for future in self.pending.values():
+            future.cancel()
+        self.total -= len(self.pending)
+        self.pending = {}
+
+    def shutdown(self):
+        self.finish()
+        self.pool.shutdown()
@@ -1,10 +1,12 @@
 import os
 
+import numpy as np
 import pygame
 
-from ..utils.io import read_tjson, write_tjson
+from ..utils.io import read_tjson, write_tjson, directory_files
 from ..utils.gfx import clip
 from .asset_utils import load_img_directory
+from .cache import cached
 
 def load_spritesheet_config(path):
     if os.path.isfile(path):
@@ -14,38 +16,46 @@ def load_spritesheet_config(path):
     write_tjson(path, config)
     return config
 
+# True where the pixel matches the split color. indexed [x, y] like surfarray.
+def split_mask(surf, split_color):
+    if surf.get_bytesize() < 3:
+        # palettes and 16 bit formats can map several colors to the same value, so the colors are compared instead
+        split_color = pygame.Color(split_color)
+        return (pygame.surfarray.array3d(surf) == (split_color.r, split_color.g, split_color.b)).all(axis=2)
+    # unused bits are masked off so that only the mapped color is compared
+    pixels = pygame.surfarray.array2d(surf).astype(np.uint32) & sum(surf.get_masks())
+    return pixels == (surf.map_rgb(split_color) & 0xFFFFFFFF)
+
 def parse_spritesheet(surf, split_color=(0, 255, 255)):
-    row_start = None
+    mask = split_mask(surf, split_color)
     loc = [0, 0]
     tiles = {}
-    for y in range(surf.get_height() - 1):
-        c1 = surf.get_at((1, y))
-        c2 = surf.get_at((1, y + 1))
-        c3 = surf.get_at((0, y + 1))
-        if (c1 == split_color) and (c2 != split_color) and (c3 == split_color):
+
+    # the split lines are found with array ops and only the (few) boundaries are walked in python
+    row_starts = mask[1, :-1] & ~mask[1, 1:] & mask[0, 1:]
+    row_ends = ~mask[1, :-1] & mask[1, 1:] & mask[0, 1:]
+    row_start = None
+    for y in np.nonzero(row_starts | row_ends)[0]:
+        if row_starts[y]:
             row_start = y
-        if (c1 != split_color) and (c2 == split_color) and (c3 == split_color) and row_start != None:
+        elif row_start != None:
             row_bounds_y = (row_start, y)
+            row = mask[:, row_start + 1]
+            col_starts = row[:-1] & ~row[1:]
+            col_ends = ~row[:-1] & row[1:]
             col_start = None
-            for x in range(surf.get_width() - 1):
-                c1 = surf.get_at((x, row_bounds_y[0] + 1))
-                c2 = surf.get_at((x + 1, row_bounds_y[0] + 1))
-                if (c1 == split_color) and (c2 != split_color):
+            for x in np.nonzero(col_starts | col_ends)[0]:
+                if col_starts[x]:
                     col_start = x
-                if (c1 != split_color) and (c2 == split_color) and col_start != None:
+                elif col_start != None:
                     col_bounds_x = (col_start, x)
                     if col_start == 0:
                         tile_bounds_y = row_bounds_y
                     else:
-                        y2 = row_start
-                        while True:
-                            c1 = surf.get_at((col_start + 1, y2))
-                            c2 = surf.get_at((col_start + 1, y2 + 1))
-                            if (c1 != split_color) and (c2 == split_color):
-                                break
-                            y2 += 1
+                        col = mask[col_start + 1, row_start:]
+                        y2 = row_start + np.nonzero(~col[:-1] & col[1:])[0][0]
                         tile_bounds_y = (row_start, y2)
-                    rect = pygame.Rect(col_bounds_x[0] + 1, tile_bounds_y[0] + 1, col_bounds_x[1] - col_bounds_x[0], tile_bounds_y[1] - tile_bounds_y[0])
+                    rect = pygame.Rect(int(col_bounds_x[0]) + 1, int(tile_bounds_y[0]) + 1, int(col_bounds_x[1] - col_bounds_x[0]), int(tile_bounds_y[1] - tile_bounds_y[0]))
                     tiles[tuple(loc)] = clip(surf, rect)
                     loc[0] += 1
                     col_start = None
@@ -55,10 +65,11 @@ def parse_spritesheet(surf, split_color=(0, 255, 255)):
     return tiles
 
 def load_spritesheets(path, split_color=(0, 255, 255), colorkey=(0, 0, 0)):
-    spritesheets = load_img_directory(path, colorkey=colorkey)
+    build = lambda: {ss_id: parse_spritesheet(img, split_color=split_color) for ss_id, img in load_img_directory(path, colorkey=colorkey).items()}
+    spritesheets = cached('spritesheets:' + path, directory_files(path, filetype='png'), build, params=[split_color, colorkey])
     for spritesheet in spritesheets:
         spritesheets[spritesheet] = {
-            'assets': parse_spritesheet(spritesheets[spritesheet], split_color=split_color),
+            'assets': spritesheets[spritesheet],
             'config': load_spritesheet_config(path + '/' + spritesheet + '.json'),
         }
         for tile in spritesheets[spritesheet]['assets']:
@@ -27,6 +27,26 @@ class Entity(Element):
         # tracks if optimized rendering can be used
         self.tweaked = False
         
+    @staticmethod
+    def pool_key(type, *args, **kwargs):
+        return type
+    
+    # re-initializes a pooled entity of the same type in place (subclasses with extra state should extend this)
+    def reuse(self, type, pos, z=0):
+        self.pos[0] = pos[0]
+        self.pos[1] = pos[1]
+        self.z = z
+        if self.action != self.config['default']:
+            self.set_action(self.config['default'])
+        elif self.animation:
+            self.animation.reset()
+        self.opacity = 255
+        self.scale = [1, 1]
+        self.rotation = 0
+        self.flip = [False, False]
+        self.visible = True
+        self.tweaked = False
+        
     @property
     def center(self):
         return self.rect.center
@@ -34,6 +54,10 @@ class Entity(Element):
     @property
     def rect(self):
         return pygame.Rect(*self.pos, *self.size)
+    
+    @property
+    def render_pos(self):
+        return self.pos
         
     @property
     def local_offset(self):
@@ -76,14 +100,15 @@ class Entity(Element):
     
     def topleft(self, offset=(0, 0)):
         img_size = self.img.get_size()
+        pos = self.render_pos
         if (not self.tweaked) or self.config['centered']:
             center_offset = (img_size[0] // 2, img_size[1] // 2) if self.config['centered'] else (0, 0)
-            return (self.pos[0] - offset[0] + self.local_offset[0] - center_offset[0], self.pos[1] - offset[1] + self.local_offset[1] - center_offset[1])
+            return (pos[0] - offset[0] + self.local_offset[0] - center_offset[0], pos[1] - offset[1] + self.local_offset[1] - center_offset[1])
         else:
             raw_img_size = self.raw_img.get_size()
             size_diff = (img_size[0] - raw_img_size[0], img_size[1] - raw_img_size[1])
             dynamic_offset = [-size_diff[0] // 2, -size_diff[1] // 2]
-            return (self.pos[0] - offset[0] + self.local_offset[0] + dynamic_offset[0], self.pos[1] - offset[1] + self.local_offset[1] + dynamic_offset[1])
+            return (pos[0] - offset[0] + self.local_offset[0] + dynamic_offset[0], pos[1] - offset[1] + self.local_offset[1] + dynamic_offset[1])
     
     def update(self, dt):
         if self.source == 'animations':
@@ -101,6 +126,7 @@ class PhysicsEntity(Entity):
     def __init__(self, type, pos, z=0):
         super().__init__(type, pos, z=z)
         self.last_pos = (0, 0)
+        self.step_pos = tuple(self.pos)
         self.velocity = [0, 0]
         self.acceleration = [0, 0]
         self.velocity_caps = [99999, 99999]
@@ -114,6 +140,14 @@ class PhysicsEntity(Entity):
         self.dropthrough = 0
         self.setup()
         
+    # interpolated between the last two physics steps when running on a fixed timestep
+    @property
+    def render_pos(self):
+        alpha = self.e['Window'].physics_alpha
+        if alpha == 1:
+            return self.pos
+        return (self.step_pos[0] + (self.pos[0] - self.step_pos[0]) * alpha, self.step_pos[1] + (self.pos[1] - self.step_pos[1]) * alpha)
+        
     @property
     def bounce2d(self):
         if type(self.bounce) not in {list, tuple}:
@@ -123,81 +157,130 @@ class PhysicsEntity(Entity):
     def setup(self):
         pass
         
+    # movement is along a single axis. tiles are tested against the span swept by the move so fast entities can't skip over them.
     def physics_processor(self, movement, tiles):
         self.collide_directions = {'up': False, 'down': False, 'right': False, 'left': False}
-        rect = self.rect
+        if not tiles:
+            return
+        width, height = self.size
+        left = int(self.pos[0])
+        top = int(self.pos[1])
+        prev_left = int(self.pos[0] - movement[0])
+        prev_top = int(self.pos[1] - movement[1])
+        sweep = (min(left, prev_left), min(top, prev_top), max(left, prev_left) + width, max(top, prev_top) + height)
+        
+        swept = []
+        block = None
+        blocker = None
+        ramps = []
         for tile in tiles:
-            if rect.colliderect(tile.rect):
+            tile_r = tile.rect
+            if (tile_r.left < sweep[2]) and (tile_r.right > sweep[0]) and (tile_r.top < sweep[3]) and (tile_r.bottom > sweep[1]):
+                swept.append(tile)
+                overlapping = (tile_r.left < left + width) and (tile_r.right > left) and (tile_r.top < top + height) and (tile_r.bottom > top)
+                # a tile blocks if the destination overlaps it or it was passed over on the way there
+                edge = None
                 if tile.physics_type == 'solid':
-                    if movement[0] > 0:
-                        rect.right = tile.rect.left
-                        self.velocity[0] *= -self.bounce2d[0]
-                        self.collide_directions['right'] = True
-                    if movement[0] < 0:
-                        rect.left = tile.rect.right
-                        self.velocity[0] *= -self.bounce2d[0]
-                        self.collide_directions['left'] = True
-                    if movement[1] > 0:
-                        rect.bottom = tile.rect.top
-                        self.velocity[1] *= -self.bounce2d[1]
-                        self.collide_directions['down'] = True
-                    if movement[1] < 0:
-                        rect.top = tile.rect.bottom
-                        self.velocity[1] *= -self.bounce2d[1]
-                        self.collide_directions['up'] = True
-                elif tile.physics_type == 'rampr':
-                    if (movement[1] > 0) or (movement[0] > 0):
-                        check_x = (rect.right - tile.rect.left) / tile.rect.width
-                        if 0 <= check_x <= 1:
-                            if rect.bottom > (1 - check_x) * tile.rect.height + tile.rect.top:
-                                rect.bottom = (1 - check_x) * tile.rect.height + tile.rect.top
-                                self.velocity[1] *= -self.bounce2d[1]
-                                self.collide_directions['down'] = True
-                elif tile.physics_type == 'rampl':
-                    if (movement[1] > 0) or (movement[0] < 0):
-                        check_x = (rect.left - tile.rect.left) / tile.rect.width
-                        if 0 <= check_x <= 1:
-                            if rect.bottom > check_x * tile.rect.height + tile.rect.top:
-                                rect.bottom = check_x * tile.rect.height + tile.rect.top
-                                self.velocity[1] *= -self.bounce2d[1]
-                                self.collide_directions['down'] = True
+                    if (movement[0] > 0) and (overlapping or (tile_r.left >= prev_left + width)):
+                        edge = tile_r.left - width
+                    if (movement[0] < 0) and (overlapping or (tile_r.right <= prev_left)):
+                        edge = tile_r.right
+                    if (movement[1] > 0) and (overlapping or (tile_r.top >= prev_top + height)):
+                        edge = tile_r.top - height
+                    if (movement[1] < 0) and (overlapping or (tile_r.bottom <= prev_top)):
+                        edge = tile_r.bottom
                 elif tile.physics_type == 'dropthrough':
-                    if not self.dropthrough:
-                        if (movement[1] > 0):
-                            if (rect.bottom > tile.rect.top) and (rect.bottom - movement[1] <= tile.rect.top + 1):
-                                rect.bottom = tile.rect.top
-                                self.velocity[1] *= -self.bounce2d[1]
-                                self.collide_directions['down'] = True
-                    
-                if rect.x != self.rect.x:
-                    self.pos[0] = rect.x
-                if rect.y != self.rect.y:
-                    self.pos[1] = rect.y
-                rect = self.rect
+                    if (not self.dropthrough) and (movement[1] > 0):
+                        if (top + height > tile_r.top) and (top + height - movement[1] <= tile_r.top + 1):
+                            edge = tile_r.top - height
+                elif tile.physics_type in {'rampr', 'rampl'}:
+                    if overlapping or ((movement[1] > 0) and (tile_r.top >= prev_top + height)):
+                        ramps.append(tile)
+                if edge != None:
+                    # keep the first edge along the direction of movement
+                    if (block == None) or ((edge < block) if (movement[0] > 0) or (movement[1] > 0) else (edge > block)):
+                        block = edge
+                        blocker = tile
+                        
+        bounce = self.bounce2d
+        if block != None:
+            if movement[0]:
+                left = block
+                self.velocity[0] *= -bounce[0]
+                self.collide_directions['right' if movement[0] > 0 else 'left'] = True
+            else:
+                top = block
+                self.velocity[1] *= -bounce[1]
+                self.collide_directions['down' if movement[1] > 0 else 'up'] = True
+                
+        landed = False
+        for tile in ramps:
+            tile_r = tile.rect
+            if tile.physics_type == 'rampr':
+                if (movement[1] > 0) or (movement[0] > 0):
+                    check_x = (left + width - tile_r.left) / tile_r.width
+                    if (0 <= check_x <= 1) and (top + height > (1 - check_x) * tile_r.height + tile_r.top):
+                        top = int((1 - check_x) * tile_r.height + tile_r.top) - height
+                        landed = True
+            else:
+                if (movement[1] > 0) or (movement[0] < 0):
+                    check_x = (left - tile_r.left) / tile_r.width
+                    if (0 <= check_x <= 1) and (top + height > check_x * tile_r.height + tile_r.top):
+                        top = int(check_x * tile_r.height + tile_r.top) - height
+                        landed = True
+        if landed:
+            self.velocity[1] *= -bounce[1]
+            self.collide_directions['down'] = True
+            
+        if left != int(self.pos[0]):
+            self.pos[0] = left
+        if top != int(self.pos[1]):
+            self.pos[1] = top
+            
+        for tile in swept:
+            tile_r = tile.rect
+            if (tile == blocker) or (tile in ramps) or ((tile_r.left < left + width) and (tile_r.right > left) and (tile_r.top < top + height) and (tile_r.bottom > top)):
                 self.last_collisions.append(tile)
                 
     def custom_update(self):
         pass
                 
     def physics_update(self, tilemap):
-        dt = self.e['Window'].dt
         self.custom_update()
         if self.next_movement[0] * -self.autoflip > 0:
             self.flip[0] = True
         if self.next_movement[0] * self.autoflip > 0:
             self.flip[0] = False
-        self.next_movement[0] += self.velocity[0] * dt
-        self.next_movement[1] += self.velocity[1] * dt
-        self.physics_move(self.next_movement, tilemap)
-        self.last_movement = (self.next_movement[0] / dt, self.next_movement[1] / dt)
-        self.velocity[0] += self.acceleration[0] * dt
-        self.velocity[1] += self.acceleration[1] * dt
-        self.velocity[0] = normalize(self.velocity[0], self.velocity_normalization[0] * dt)
-        self.velocity[1] = normalize(self.velocity[1], self.velocity_normalization[1] * dt)
-        self.velocity[0] = max(-self.velocity_caps[0], min(self.velocity_caps[0], self.velocity[0]))
-        self.velocity[1] = max(-self.velocity_caps[1], min(self.velocity_caps[1], self.velocity[1]))
+        steps = self.e['Window'].physics_steps()
+        if not len(steps):
+            # forces applied this frame carry over to the next step
+            return
+        # movement from applied forces is spread over the steps of the frame
+        forced = (self.next_movement[0] / len(steps), self.next_movement[1] / len(steps))
+        total = [0, 0]
+        # collisions from every step of the frame are reported so that a landing in an earlier step isn't lost
+        collide_directions = {'up': False, 'down': False, 'right': False, 'left': False}
+        collisions = []
+        for dt in steps:
+            self.step_pos = tuple(self.pos)
+            movement = (forced[0] + self.velocity[0] * dt, forced[1] + self.velocity[1] * dt)
+            self.physics_move(movement, tilemap)
+            for direction in collide_directions:
+                collide_directions[direction] = collide_directions[direction] or self.collide_directions[direction]
+            collisions += self.last_collisions
+            total[0] += movement[0]
+            total[1] += movement[1]
+            self.velocity[0] += self.acceleration[0] * dt
+            self.velocity[1] += self.acceleration[1] * dt
+            self.velocity[0] = normalize(self.velocity[0], self.velocity_normalization[0] * dt)
+            self.velocity[1] = normalize(self.velocity[1], self.velocity_normalization[1] * dt)
+            self.velocity[0] = max(-self.velocity_caps[0], min(self.velocity_caps[0], self.velocity[0]))
+            self.velocity[1] = max(-self.velocity_caps[1], min(self.velocity_caps[1], self.velocity[1]))
+            self.dropthrough = max(0, self.dropthrough - dt)
+        self.collide_directions = collide_directions
+        self.last_collisions = collisions
+        self.last_movement = (total[0] / sum(steps), total[1] / sum(steps))
         self.next_movement = [0, 0]
-        self.dropthrough = max(0, self.dropthrough - dt)
         
     def apply_force(self, vec):
         self.next_movement[0] += vec[0] * self.e['Window'].dt
@@ -207,8 +290,6 @@ class PhysicsEntity(Entity):
         self.last_collisions = []
         self.last_pos = tuple(self.pos)
         self.pos[0] += movement[0]
-        tiles = tilemap.nearby_grid_physics(self.center)
-        self.physics_processor((movement[0], 0), tiles)
+        self.physics_processor((movement[0], 0), tilemap.sweep_physics(self.pos, self.size, (movement[0], 0)))
         self.pos[1] += movement[1]
-        tiles = tilemap.nearby_grid_physics(self.center)
-        self.physics_processor((0, movement[1]), tiles)
\ No newline at end of file
+        self.physics_processor((0, movement[1]), tilemap.sweep_physics(self.pos, self.size, (0, movement[1])))
\ No newline at end of file
@@ -6,6 +6,7 @@ from ..utils.elements import ElementSingleton
 from ..utils.io import read_json, write_json
 from ..assets.asset_utils import load_img_directory
 from ..assets.animation import Animation
+from ..assets.lazy import LazyDict, asset_size
 
 class EntityData:
     def __init__(self, config, animations=None):
@@ -25,11 +26,16 @@ class EntityData:
                     animation_images = [img for img in self.assets[animation].values() if type(img) == pygame.Surface]
                 self.animations[animation] = Animation(animation_images, config=self.config['animations'][animation])
 
+    def resident_size(self):
+        return asset_size(self.assets)
+
 class EntityDB(ElementSingleton):
-    def __init__(self, path=None):
+    # lazy entity types have their configs generated up front, but their images are only loaded on the first lookup
+    def __init__(self, path=None, lazy=False):
         super().__init__()
         self.path = path
-        self.configs = {}
+        self.lazy = lazy
+        self.configs = LazyDict(EntityData) if lazy else {}
         if path:
             self.load(path)
         
@@ -76,4 +82,7 @@ class EntityDB(ElementSingleton):
                     config['default'] = images[0]
             
             write_json(self.path + '/' + entity + '/config.json', config)
-            self.configs[config['id']] = EntityData(config)
+            if self.lazy:
+                self.configs.add_source(config['id'], config)
+            else:
+                self.configs[config['id']] = EntityData(config)
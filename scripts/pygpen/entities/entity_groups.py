@@ -4,12 +4,16 @@ from ..utils.elements import ElementSingleton
 from ..data_structures.entity_quads import EQuads
 
 class EntityGroups(ElementSingleton):
-    def __init__(self, quad_size=64, quad_groups=[]):
+    def __init__(self, quad_size=64, quad_groups=[], pool_size=256):
         super().__init__()
         self.groups = {}
         self.locked = False
         self.add_queue = []
         
+        # (class, type) -> finished entities waiting to be re-initialized by spawn()
+        self.pools = {}
+        self.pool_size = pool_size
+        
         self.quad_groups = set(quad_groups)
         self.equads = EQuads(quad_size=quad_size)
         
@@ -28,6 +32,27 @@ class EntityGroups(ElementSingleton):
                     self.groups[group] = []
                 self.groups[group].append(entity)
     
+    # creates or reuses an entity. entities spawned this way return to their pool when killed.
+    # cls needs a pool_key() staticmethod and a reuse() method that take the same arguments as the constructor.
+    def spawn(self, cls, group, *args, **kwargs):
+        key = (cls, cls.pool_key(*args, **kwargs))
+        if (key in self.pools) and len(self.pools[key]):
+            entity = self.pools[key].pop()
+            entity.reuse(*args, **kwargs)
+        else:
+            entity = cls(*args, **kwargs)
+            entity._pool = key
+        self.add(entity, group)
+        return entity
+    
+    def release(self, entity):
+        key = getattr(entity, '_pool', None)
+        if key:
+            if key not in self.pools:
+                self.pools[key] = []
+            if len(self.pools[key]) < self.pool_size:
+                self.pools[key].append(entity)
+    
     def update(self, group=None, unlock=True, quad_rect=pygame.Rect(0, 0, 100, 100)):
         dt = self.e['Window'].dt
         
@@ -47,6 +72,7 @@ class EntityGroups(ElementSingleton):
                         # delete from quads if applicable
                         if group in self.quad_groups:
                             self.equads.delete(entity)
+                        self.release(entity)
         else:
             for group in self.groups:
                 self.update(group, unlock=False)
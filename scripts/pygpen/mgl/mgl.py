@@ -4,6 +4,7 @@ import moderngl
 import pygame
 
 from .render_object import RenderObject
+from .pipeline import PostPipeline
 from ..utils.elements import ElementSingleton
 from ..utils.io import read_f
 
@@ -56,16 +57,22 @@ class MGL(ElementSingleton):
         self.default_vert = default_vert_shader
         self.default_frag = default_frag_shader
         
-    def default_ro(self):
-        return RenderObject(self.default_frag, default_ro=True)
+    def default_ro(self, pbo=False):
+        return RenderObject(self.default_frag, default_ro=True, pbo=pbo)
         
-    def render_object(self, frag_path, vert_shader=None, vao_args=['2f 2f', 'vert', 'texcoord'], buffer=None):
+    def render_object(self, frag_path, vert_shader=None, vao_args=['2f 2f', 'vert', 'texcoord'], buffer=None, pbo=False):
         frag_shader = read_f(frag_path)
         if vert_shader:
             vert_shader = read_f(vert_shader)
-        return RenderObject(frag_shader, vert_shader=vert_shader, vao_args=vao_args, buffer=buffer)
+        return RenderObject(frag_shader, vert_shader=vert_shader, vao_args=vao_args, buffer=buffer, pbo=pbo)
+            
+    def pipeline(self, size):
+        return PostPipeline(size)
             
     def pg2tx(self, surf):
+        # subsurfaces (ex: atlas regions) don't have contiguous pixel data
+        if surf.get_parent():
+            surf = surf.copy()
         channels = 4
         new_tex = self.ctx.texture(surf.get_size(), channels)
         new_tex.filter = (moderngl.NEAREST, moderngl.NEAREST)
@@ -73,6 +80,13 @@ class MGL(ElementSingleton):
         new_tex.write(surf.get_view('1'))
         return new_tex
     
-    def pg2tx_update(self, tex, surf):
-        tex.write(surf.get_view('1'))
+    # the upload goes through the pixel buffer when one is given so that the copy into the texture happens asynchronously
+    def pg2tx_update(self, tex, surf, pbo=None):
+        if surf.get_parent():
+            surf = surf.copy()
+        if pbo:
+            pbo.write(surf.get_view('1'))
+            tex.write(pbo)
+        else:
+            tex.write(surf.get_view('1'))
         return tex
\ No newline at end of file
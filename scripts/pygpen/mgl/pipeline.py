@@ -0,0 +1,245 @@
+from array import array
+
+import moderngl
+import pygame
+
+from .render_object import RenderObject
+from ..utils.elements import Element
+from ..utils.io import read_f
+
+threshold_frag_shader = '''
+#version 330
+
+uniform sampler2D surface;
+uniform float threshold = 0.6;
+
+out vec4 f_color;
+in vec2 uv;
+
+void main() {
+  vec3 color = texture(surface, uv).rgb;
+  f_color = vec4(max(color - threshold, 0.0) / (1.0 - threshold), 1.0);
+}
+'''
+
+blur_frag_shader = '''
+#version 330
+
+uniform sampler2D surface;
+uniform vec2 resolution;
+uniform vec2 direction;
+
+out vec4 f_color;
+in vec2 uv;
+
+void main() {
+  // 9 tap gaussian done with 5 linearly filtered samples
+  vec2 step = direction / resolution;
+  vec3 color = texture(surface, uv).rgb * 0.2270270270;
+  color += texture(surface, uv + step * 1.3846153846).rgb * 0.3162162162;
+  color += texture(surface, uv - step * 1.3846153846).rgb * 0.3162162162;
+  color += texture(surface, uv + step * 3.2307692308).rgb * 0.0702702703;
+  color += texture(surface, uv - step * 3.2307692308).rgb * 0.0702702703;
+  f_color = vec4(color, 1.0);
+}
+'''
+
+composite_frag_shader = '''
+#version 330
+
+uniform sampler2D surface;
+uniform sampler2D glow;
+uniform float strength = 1.0;
+
+out vec4 f_color;
+in vec2 uv;
+
+void main() {
+  f_color = vec4(texture(surface, uv).rgb + texture(glow, uv).rgb * strength, 1.0);
+}
+'''
+
+class PostPass:
+    def __init__(self, pipeline, name, render_object, inputs, scale, uniforms, output, dtype='f1'):
+        self.pipeline = pipeline
+        self.name = name
+        self.render_object = render_object
+        # uniform -> pass or pipeline input name
+        self.inputs = inputs
+        self.scale = scale
+        self.uniforms = uniforms
+        self.output = output
+        self.dtype = dtype
+        self.program_uniforms = set(render_object.program)
+        self.texture = None
+        self.framebuffer = None
+        # source versions used for the last render
+        self.seen = {}
+        self.dirty = True
+        if not output:
+            self.resize()
+
+    @property
+    def size(self):
+        return (max(1, int(self.pipeline.size[0] * self.scale)), max(1, int(self.pipeline.size[1] * self.scale)))
+
+    def resize(self):
+        self.release_target()
+        ctx = self.pipeline.e['MGL'].ctx
+        self.texture = ctx.texture(self.size, 4, dtype=self.dtype)
+        self.texture.filter = (moderngl.LINEAR, moderngl.LINEAR) if self.scale != 1 else (moderngl.NEAREST, moderngl.NEAREST)
+        self.texture.repeat_x = False
+        self.texture.repeat_y = False
+        self.framebuffer = ctx.framebuffer(color_attachments=[self.texture])
+        self.dirty = True
+
+    def set_uniform(self, name, value):
+        self.uniforms[name] = value
+        self.dirty = True
+
+    # uniform -> source for everything the pass reads
+    def sources(self):
+        sources = {name: name for name in self.program_uniforms if name in self.pipeline.values}
+        sources.update(self.inputs)
+        return sources
+
+    def changed(self, sources):
+        if self.dirty or self.output:
+            return True
+        for source in sources.values():
+            if self.seen.get(source) != self.pipeline.versions.get(source):
+                return True
+        return False
+
+    def render(self, dest=None):
+        sources = self.sources()
+        if not self.changed(sources):
+            return False
+        uniforms = {name: self.pipeline.values[source] for name, source in sources.items()}
+        uniforms.update(self.uniforms)
+        if 'resolution' in self.program_uniforms:
+            uniforms['resolution'] = self.size if not self.output else self.pipeline.size
+        self.render_object.render(dest=dest if self.output else self.framebuffer, uniforms=uniforms)
+        self.seen = {source: self.pipeline.versions.get(source) for source in sources.values()}
+        self.dirty = False
+        if not self.output:
+            self.pipeline.set_value(self.name, self.texture)
+        return True
+
+    def release_target(self):
+        if self.framebuffer:
+            self.framebuffer.release()
+            self.texture.release()
+        self.framebuffer = None
+        self.texture = None
+
+    def release(self):
+        self.release_target()
+        self.render_object.release()
+
+# chains RenderObjects through framebuffers. passes run in the order they're added and can read the output of earlier passes by name.
+# passes are skipped when none of their sources changed since they last ran. the output pass renders to the screen every frame.
+# surfaces and textures passed to render() count as changed every frame unless set_static() was used for them.
+class PostPipeline(Element):
+    def __init__(self, size):
+        super().__init__()
+        self.size = tuple(size)
+        self.default = False
+        self.passes = []
+        self.pass_names = {}
+        self.values = {}
+        self.versions = {}
+        self.static = set()
+        self.surface_textures = {}
+        self.renders = 0
+        self.skips = 0
+        # texture coordinates are flipped for framebuffer passes so that their output has the same row order as MGL.pg2tx() textures
+        self.framebuffer_quad = self.e['MGL'].ctx.buffer(data=array('f', [
+            -1.0, 1.0, 0.0, 1.0,
+            -1.0, -1.0, 0.0, 0.0,
+            1.0, 1.0, 1.0, 1.0,
+            1.0, -1.0, 1.0, 0.0,
+        ]))
+
+    # dtype is the format of the pass's texture. 'f2' keeps values over 1 for later passes.
+    def add_pass(self, name, frag_shader=None, frag_path=None, inputs={}, scale=1, uniforms={}, output=False, dtype='f1'):
+        if frag_path:
+            frag_shader = read_f(frag_path)
+        render_object = RenderObject(frag_shader, buffer=None if output else self.framebuffer_quad)
+        post_pass = PostPass(self, name, render_object, dict(inputs), scale, dict(uniforms), output, dtype=dtype)
+        self.passes.append(post_pass)
+        self.pass_names[name] = post_pass
+        return post_pass
+
+    # adds a bright pass followed by a separable blur. the result can be read as name.
+    # with composite, the bloom is also added onto source (unclamped) as a full resolution pass that can be read as composite,
+    # so shaders written for the plain surface don't need to know about the bloom.
+    def add_bloom(self, name, source='surface', scale=0.5, threshold=0.6, spread=1, composite=None, strength=1.0):
+        self.add_pass(name + '_bright', threshold_frag_shader, inputs={'surface': source}, scale=scale, uniforms={'threshold': threshold})
+        self.add_blur(name, name + '_bright', scale=scale, spread=spread)
+        if composite:
+            self.add_pass(composite, composite_frag_shader, inputs={'surface': source, 'glow': name}, uniforms={'strength': strength}, dtype='f2')
+
+    def add_blur(self, name, source, scale=0.5, spread=1):
+        self.add_pass(name + '_h', blur_frag_shader, inputs={'surface': source}, scale=scale, uniforms={'direction': (spread, 0)})
+        self.add_pass(name, blur_frag_shader, inputs={'surface': name + '_h'}, scale=scale, uniforms={'direction': (0, spread)})
+
+    def __getitem__(self, key):
+        return self.pass_names[key]
+
+    def set_static(self, name, static=True):
+        if static:
+            self.static.add(name)
+        elif name in self.static:
+            self.static.remove(name)
+
+    def resize(self, size):
+        self.size = tuple(size)
+        for post_pass in self.passes:
+            if not post_pass.output:
+                post_pass.resize()
+
+    def set_value(self, name, value):
+        self.versions[name] = self.versions.get(name, 0) + 1
+        self.values[name] = value
+
+    def set_input(self, name, value):
+        if type(value) == pygame.Surface:
+            value = self.surface_texture(name, value)
+        if name in self.values:
+            if isinstance(value, moderngl.Texture):
+                if (name in self.static) and (value is self.values[name]):
+                    return
+            elif value == self.values[name]:
+                return
+        self.set_value(name, value)
+
+    def surface_texture(self, name, surf):
+        key = (name, surf.get_size())
+        if key in self.surface_textures:
+            if name not in self.static:
+                self.e['MGL'].pg2tx_update(self.surface_textures[key], surf)
+        else:
+            for old_key in [k for k in self.surface_textures if k[0] == name]:
+                self.surface_textures[old_key].release()
+                del self.surface_textures[old_key]
+            self.surface_textures[key] = self.e['MGL'].pg2tx(surf)
+        return self.surface_textures[key]
+
+    # same interface as RenderObject.render() so that it can be used as the Window's render object
+    def render(self, dest=None, uniforms={}):
+        for name, value in uniforms.items():
+            self.set_input(name, value)
+        for post_pass in self.passes:
+            if post_pass.render(dest=dest):
+                self.renders += 1
+            else:
+                self.skips += 1
+
+    def release(self):
+        for post_pass in self.passes:
+            post_pass.release()
+        for tex in self.surface_textures.values():
+            tex.release()
+        self.surface_textures = {}
+        self.framebuffer_quad.release()
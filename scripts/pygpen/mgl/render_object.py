@@ -1,10 +1,12 @@
+import time
+
 import moderngl
 import pygame
 
 from ..utils.elements import Element
 
 class RenderObject(Element):
-    def __init__(self, frag_shader, vert_shader=None, default_ro=False, vao_args=['2f 2f', 'vert', 'texcoord'], buffer=None):
+    def __init__(self, frag_shader, vert_shader=None, default_ro=False, vao_args=['2f 2f', 'vert', 'texcoord'], buffer=None, pbo=False):
         super().__init__()
         if not vert_shader:
             vert_shader = self.e['MGL'].default_vert
@@ -16,8 +18,16 @@ class RenderObject(Element):
         if not buffer:
             buffer = self.e['MGL'].quad_buffer
         self.vao = self.e['MGL'].ctx.vertex_array(self.program, [(buffer, *vao_args)])
-        self.temp_textures = []
         self.debug = False
+        
+        # surface uniforms are uploaded into persistent textures keyed by (uniform, size)
+        self.textures = {}
+        # (uniform, size) -> [pixel buffers, next index] for double-buffered uploads
+        self.pbo = pbo
+        self.pbos = {}
+        self.texture_allocations = 0
+        self.texture_uploads = 0
+        self.upload_time = 0
     
     def update(self, uniforms={}):
         tex_id = 0
@@ -33,13 +43,48 @@ class RenderObject(Element):
                 else:
                     self.program[uniform].value = uniforms[uniform]
                     
+    def surface_texture(self, name, surf):
+        key = (name, surf.get_size())
+        start = time.perf_counter()
+        if key not in self.textures:
+            # a size change replaces the uniform's texture
+            for old_key in [k for k in self.textures if k[0] == name]:
+                self.release_texture(old_key)
+            self.textures[key] = self.e['MGL'].pg2tx(surf)
+            self.texture_allocations += 1
+            if self.pbo:
+                size = surf.get_width() * surf.get_height() * 4
+                self.pbos[key] = [[self.e['MGL'].ctx.buffer(reserve=size, dynamic=True) for i in range(2)], 0]
+        else:
+            pbo = None
+            if key in self.pbos:
+                pbos = self.pbos[key]
+                pbo = pbos[0][pbos[1]]
+                pbos[1] = 1 - pbos[1]
+            self.e['MGL'].pg2tx_update(self.textures[key], surf, pbo=pbo)
+        self.texture_uploads += 1
+        self.upload_time += time.perf_counter() - start
+        return self.textures[key]
+    
     def parse_uniforms(self, uniforms):
         for name, value in uniforms.items():
             if type(value) == pygame.Surface:
-                tex = self.e['MGL'].pg2tx(value)
-                uniforms[name] = tex
-                self.temp_textures.append(tex)
+                uniforms[name] = self.surface_texture(name, value)
         return uniforms
+    
+    def release_texture(self, key):
+        self.textures[key].release()
+        del self.textures[key]
+        if key in self.pbos:
+            for pbo in self.pbos[key][0]:
+                pbo.release()
+            del self.pbos[key]
+    
+    def release(self):
+        for key in list(self.textures):
+            self.release_texture(key)
+        self.vao.release()
+        self.program.release()
         
     def render(self, dest=None, uniforms={}):
         if not dest:
@@ -48,8 +93,4 @@ class RenderObject(Element):
         dest.use()
         uniforms = self.parse_uniforms(uniforms)
         self.update(uniforms=uniforms)
-        self.vao.render(mode=moderngl.TRIANGLE_STRIP)
-        
-        for tex in self.temp_textures:
-            tex.release()
-        self.temp_textures = []
\ No newline at end of file
+        self.vao.render(mode=moderngl.TRIANGLE_STRIP)
\ No newline at end of file
@@ -1,3 +1,5 @@
+import pygame
+
 from ..utils.gfx import smooth_approach
 from ..utils.elements import Element
 
@@ -15,7 +17,11 @@ class Camera(Element):
     @property
     def target(self):
         if self.target_entity:
-            return (self.target_entity.center[0] - self.size[0] // 2, self.target_entity.center[1] - self.size[1] // 2)
+            center = self.target_entity.center
+            if hasattr(self.target_entity, 'render_pos'):
+                # follows the interpolated position that the entity is drawn at rather than its last physics step
+                center = pygame.Rect(*self.target_entity.render_pos, *self.target_entity.size).center
+            return (center[0] - self.size[0] // 2, center[1] - self.size[1] // 2)
         elif self.target_pos:
             return (self.target_pos[0] - self.size[0] // 2, self.target_pos[0] - self.size[1] // 2)
     
@@ -0,0 +1,26 @@
+# accumulates frame time and hands it out as a whole number of fixed steps
+class FixedTimestep:
+    def __init__(self, hz=60, max_steps=5):
+        self.max_steps = max_steps
+        self.accumulator = 0
+        self.steps = 0
+        self.total_steps = 0
+        self.alpha = 0
+        self.set_hz(hz)
+        
+    def set_hz(self, hz):
+        self.hz = hz
+        self.dt = 1 / hz
+        
+    def advance(self, dt):
+        self.accumulator += dt
+        self.steps = int(self.accumulator / self.dt)
+        if self.steps > self.max_steps:
+            # drop the time that can't be simulated so cost stays bounded after a stall
+            self.steps = self.max_steps
+            self.accumulator = self.dt * self.max_steps
+        self.accumulator -= self.steps * self.dt
+        self.total_steps += self.steps
+        # how far between the last two physics states the current frame is (for interpolating rendering)
+        self.alpha = self.accumulator / self.dt
+        return self.steps
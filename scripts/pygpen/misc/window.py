@@ -4,9 +4,10 @@ import pygame
 
 from ..utils.elements import ElementSingleton
 from ..mgl.mgl import MGL
+from .timestep import FixedTimestep
 
 class Window(ElementSingleton):
-    def __init__(self, dimensions=(640, 480), caption='pygpen window', flags=0, fps_cap=60, dt_cap=1, opengl=False, frag_path=None):
+    def __init__(self, dimensions=(640, 480), caption='pygpen window', flags=0, fps_cap=60, dt_cap=1, opengl=False, frag_path=None, physics_hz=None):
         super().__init__()
         self.opengl = opengl
         self.frag_path = frag_path
@@ -29,6 +30,8 @@ class Window(ElementSingleton):
         
         self.last_frame = time.time()
         self.dt = 0.1
+        self.timestep = None
+        self.set_physics_hz(physics_hz)
         
         self.render_object = None
         if self.opengl:
@@ -46,6 +49,25 @@ class Window(ElementSingleton):
     def runtime(self):
         return self.time - self.start_time
     
+    @property
+    def physics_alpha(self):
+        return self.timestep.alpha if self.timestep else 1
+    
+    # physics runs at a fixed rate when set. None integrates with the frame dt.
+    def set_physics_hz(self, hz):
+        if not hz:
+            self.timestep = None
+        elif self.timestep:
+            self.timestep.set_hz(hz)
+        else:
+            self.timestep = FixedTimestep(hz)
+            
+    # the dts to integrate physics with this frame
+    def physics_steps(self, dt=None):
+        if self.timestep:
+            return [self.timestep.dt] * self.timestep.steps
+        return [self.dt if dt == None else dt]
+    
     def cycle(self, uniforms={}):
         if self.render_object:
             if self.render_object.default and ('surface' not in uniforms):
@@ -54,6 +76,8 @@ class Window(ElementSingleton):
         pygame.display.flip()
         self.clock.tick(self.fps_cap)
         self.dt = min(time.time() - self.last_frame, self.dt_cap)
+        if self.timestep:
+            self.timestep.advance(self.dt)
         self.frame_log.append(self.dt)
         self.frame_log = self.frame_log[-60:]
         self.last_frame = time.time()
@@ -0,0 +1,334 @@
+import weakref
+from array import array
+
+import numpy as np
+import moderngl
+import pygame
+
+from .renderer import Renderer
+from ..assets.atlas import ShelfPacker
+from ..utils.gfx import surface_rgba
+
+sprite_vert_shader = '''
+#version 330
+
+uniform vec2 target_size;
+uniform float scale;
+
+in vec2 vert;
+in vec4 dest;
+in vec4 region;
+in float alpha;
+
+out vec2 uv;
+out float sprite_alpha;
+
+void main() {
+  // positions snap to the target's pixel grid like Surface.blit() truncates them
+  vec2 pos = trunc(dest.xy * scale) / scale + vert * dest.zw;
+  uv = mix(region.xy, region.zw, vert);
+  sprite_alpha = alpha;
+  gl_Position = vec4(pos / target_size * 2.0 - 1.0, 0.0, 1.0);
+}
+'''
+
+sprite_frag_shader = '''
+#version 330
+
+uniform sampler2D atlas;
+
+in vec2 uv;
+in float sprite_alpha;
+
+out vec4 f_color;
+
+void main() {
+  vec4 color = texture(atlas, uv);
+  // colorkeyed pixels never reach the blend stage
+  if (color.a == 0.0) {
+    discard;
+  }
+  f_color = vec4(color.rgb, color.a * sprite_alpha);
+}
+'''
+
+BLEND_FUNCS = {
+    0: (moderngl.SRC_ALPHA, moderngl.ONE_MINUS_SRC_ALPHA, moderngl.ONE, moderngl.ONE_MINUS_SRC_ALPHA),
+    pygame.BLEND_RGB_ADD: (moderngl.ONE, moderngl.ONE, moderngl.ZERO, moderngl.ONE),
+    pygame.BLEND_RGBA_ADD: (moderngl.ONE, moderngl.ONE, moderngl.ONE, moderngl.ONE),
+    pygame.BLEND_RGB_MULT: (moderngl.DST_COLOR, moderngl.ZERO, moderngl.ZERO, moderngl.ONE),
+    pygame.BLEND_RGBA_MULT: (moderngl.DST_COLOR, moderngl.ZERO, moderngl.DST_ALPHA, moderngl.ZERO),
+}
+
+# x, y, w, h, u0, v0, u1, v1, alpha
+INSTANCE_FLOATS = 9
+
+class AtlasPage:
+    def __init__(self, ctx, size, texture=None):
+        self.size = size
+        self.texture = texture
+        if not texture:
+            self.texture = ctx.texture(size, 4)
+            self.texture.filter = (moderngl.NEAREST, moderngl.NEAREST)
+        self.packer = ShelfPacker(size)
+
+    def add(self, surf):
+        size = surf.get_size()
+        pos = self.packer.pack(size)
+        if not pos:
+            return None
+        self.texture.write(surface_rgba(surf), viewport=(pos[0], pos[1], size[0], size[1]))
+        return (self, (pos[0] / self.size[0], pos[1] / self.size[1], (pos[0] + size[0]) / self.size[0], (pos[1] + size[1]) / self.size[1]))
+
+    def release(self):
+        self.texture.release()
+
+# surfaces are uploaded once and kept while they're alive. surfaces only seen in one frame go to scratch pages that are reused every frame.
+# surfaces are assumed not to change after they've been drawn twice. use refresh() for ones that do.
+class SpriteAtlas:
+    def __init__(self, ctx, page_size=(2048, 2048), max_pages=4):
+        self.ctx = ctx
+        self.page_size = page_size
+        self.max_pages = max_pages
+        self.pages = []
+        self.scratch_pages = []
+        self.scratch_index = 0
+        self.regions = weakref.WeakKeyDictionary()
+        self.frame_regions = {}
+        self.seen = weakref.WeakKeyDictionary()
+        self.frame = 0
+        self.full = False
+        self.uploads = 0
+        # pages of a TextureAtlas built at load time. subsurfaces of these are drawn straight from the page's texture.
+        self.linked_atlas = None
+        self.linked_version = None
+        self.linked_pages = {}
+
+    def begin_frame(self):
+        self.frame += 1
+        self.frame_regions = {}
+        for page in self.scratch_pages:
+            page.packer.reset()
+        self.scratch_index = 0
+        if self.full:
+            # everything is repacked once the persistent pages run out
+            self.clear()
+
+    def clear(self):
+        for page in self.pages:
+            page.release()
+        self.pages = []
+        self.regions = weakref.WeakKeyDictionary()
+        self.full = False
+
+    def link(self, atlas):
+        if (atlas is self.linked_atlas) and (atlas.version == self.linked_version):
+            return
+        for surf in [surf for surf in self.regions if surf.get_parent()]:
+            del self.regions[surf]
+        self.linked_atlas = atlas
+        self.linked_version = atlas.version
+        self.linked_pages = {}
+        for surf, tex in zip(atlas.page_surfaces(), atlas.page_textures()):
+            self.linked_pages[surf] = AtlasPage(self.ctx, surf.get_size(), texture=tex)
+
+    def linked_region(self, surf):
+        parent = surf.get_abs_parent()
+        if parent in self.linked_pages:
+            page = self.linked_pages[parent]
+            offset = surf.get_abs_offset()
+            region = (page, (offset[0] / page.size[0], offset[1] / page.size[1], (offset[0] + surf.get_width()) / page.size[0], (offset[1] + surf.get_height()) / page.size[1]))
+            self.regions[surf] = region
+            return region
+        return None
+
+    def refresh(self, surf):
+        if surf in self.regions:
+            del self.regions[surf]
+        if surf in self.seen:
+            del self.seen[surf]
+
+    def add_persistent(self, surf):
+        for page in self.pages:
+            region = page.add(surf)
+            if region:
+                return region
+        if len(self.pages) < self.max_pages:
+            self.pages.append(AtlasPage(self.ctx, (max(self.page_size[0], surf.get_width()), max(self.page_size[1], surf.get_height()))))
+            return self.pages[-1].add(surf)
+        self.full = True
+        return None
+
+    def add_scratch(self, surf):
+        while self.scratch_index < len(self.scratch_pages):
+            region = self.scratch_pages[self.scratch_index].add(surf)
+            if region:
+                return region
+            self.scratch_index += 1
+        self.scratch_pages.append(AtlasPage(self.ctx, (max(self.page_size[0], surf.get_width()), max(self.page_size[1], surf.get_height()))))
+        return self.scratch_pages[-1].add(surf)
+
+    # returns (page, uv rect)
+    def region(self, surf):
+        if surf in self.regions:
+            return self.regions[surf]
+        if id(surf) in self.frame_regions:
+            return self.frame_regions[id(surf)][1]
+        if len(self.linked_pages) and surf.get_parent():
+            region = self.linked_region(surf)
+            if region:
+                return region
+        self.uploads += 1
+        if (surf in self.seen) and (self.seen[surf] != self.frame):
+            region = self.add_persistent(surf)
+            if region:
+                del self.seen[surf]
+                self.regions[surf] = region
+                return region
+        else:
+            self.seen[surf] = self.frame
+        region = self.add_scratch(surf)
+        # the surface is held for the frame so that its id can't be reused
+        self.frame_regions[id(surf)] = (surf, region)
+        return region
+
+class RenderTarget:
+    def __init__(self, ctx, size, scale=1, transparent=False):
+        self.size = size
+        self.scale = scale
+        self.transparent = transparent
+        self.texture = ctx.texture((int(size[0] * scale), int(size[1] * scale)), 4)
+        self.texture.filter = (moderngl.NEAREST, moderngl.NEAREST)
+        self.framebuffer = ctx.framebuffer(color_attachments=[self.texture])
+        # render functions draw here. it's kept clear between runs of functions.
+        self.overlay = pygame.Surface(size, pygame.SRCALPHA)
+
+    def release(self):
+        self.framebuffer.release()
+        self.texture.release()
+
+# instances are drawn in as few calls as possible. a new call is needed whenever the texture or blend mode changes.
+class SpriteBatch:
+    def __init__(self, renderer):
+        self.renderer = renderer
+        self.texture = None
+        self.special_flags = 0
+        self.instances = []
+
+    def add(self, texture, special_flags, instance):
+        if (texture != self.texture) or (special_flags != self.special_flags):
+            self.flush()
+            self.texture = texture
+            self.special_flags = special_flags
+        self.instances.append(instance)
+
+    def flush(self):
+        self.renderer.flush(self.texture, self.special_flags, self.instances)
+        self.instances = []
+
+# renders the queue as instanced quads into a texture per group. cycle() returns the textures, which can be passed to Window.cycle() as uniforms.
+class GPURenderer(Renderer):
+    def __init__(self, groups=['default'], scale=1, page_size=(2048, 2048)):
+        super().__init__(groups=groups)
+        self.scale = scale
+        self.ctx = self.e['MGL'].ctx
+        self.program = self.ctx.program(vertex_shader=sprite_vert_shader, fragment_shader=sprite_frag_shader)
+        self.quad_buffer = self.ctx.buffer(data=array('f', [0.0, 0.0, 1.0, 0.0, 0.0, 1.0, 1.0, 1.0]))
+        self.instance_capacity = 0
+        self.instance_buffer = None
+        self.vao = None
+        self.reserve(1024)
+        self.atlas = SpriteAtlas(self.ctx, page_size=page_size)
+        self.targets = {}
+        self.draw_calls = 0
+
+    def reserve(self, count):
+        if count <= self.instance_capacity:
+            return
+        while self.instance_capacity < count:
+            self.instance_capacity = max(1024, self.instance_capacity * 2)
+        if self.vao:
+            self.vao.release()
+            self.instance_buffer.release()
+        self.instance_buffer = self.ctx.buffer(reserve=self.instance_capacity * INSTANCE_FLOATS * 4, dynamic=True)
+        self.vao = self.ctx.vertex_array(self.program, [(self.quad_buffer, '2f', 'vert'), (self.instance_buffer, '4f 4f 1f/i', 'dest', 'region', 'alpha')])
+
+    def target(self, group, dest):
+        size = dest.get_size() if isinstance(dest, pygame.Surface) else tuple(dest)
+        transparent = isinstance(dest, pygame.Surface) and bool(dest.get_flags() & pygame.SRCALPHA)
+        target = self.targets[group] if group in self.targets else None
+        if (not target) or (target.size != size) or (target.scale != self.scale) or (target.transparent != transparent):
+            if target:
+                target.release()
+            target = RenderTarget(self.ctx, size, scale=self.scale, transparent=transparent)
+            self.targets[group] = target
+        return target
+
+    def flush(self, texture, special_flags, instances):
+        if not len(instances):
+            return
+        self.reserve(len(instances))
+        self.instance_buffer.write(np.array(instances, dtype=np.float32).tobytes())
+        self.ctx.blend_func = BLEND_FUNCS[special_flags] if special_flags in BLEND_FUNCS else BLEND_FUNCS[0]
+        texture.use(0)
+        self.vao.render(moderngl.TRIANGLE_STRIP, instances=len(instances))
+        self.draw_calls += 1
+
+    # only the part of the overlay that the functions drew on is uploaded. it goes through the atlas's scratch pages like any other one-off surface.
+    def render_functions(self, target, funcs, batch):
+        for func in funcs:
+            func[0](target.overlay, *func[1], **func[2])
+        rect = target.overlay.get_bounding_rect()
+        if not (rect.width and rect.height):
+            return
+        self.atlas.uploads += 1
+        page, uvs = self.atlas.add_scratch(target.overlay.subsurface(rect))
+        target.overlay.fill((0, 0, 0, 0), rect)
+        batch.add(page.texture, 0, (rect.x, rect.y, rect.width, rect.height, uvs[0], uvs[1], uvs[2], uvs[3], 1))
+
+    def render_target(self, target, layers):
+        target.framebuffer.use()
+        target.framebuffer.clear(0, 0, 0, 0 if target.transparent else 1)
+        self.program['target_size'].value = target.size
+        self.program['scale'].value = self.scale
+        self.program['atlas'].value = 0
+        region = self.atlas.region
+
+        batch = SpriteBatch(self)
+        funcs = []
+        for z in sorted(layers):
+            queue = layers[z]
+            self.render_count += len(queue)
+            layer_flags = self.blend_modes[z] if z in self.blend_modes else 0
+            for item in queue:
+                if len(item) == 2:
+                    if len(funcs):
+                        self.render_functions(target, funcs, batch)
+                        funcs = []
+                    surf = item[0]
+                    page, uvs = region(surf)
+                    alpha = surf.get_alpha()
+                    batch.add(page.texture, layer_flags, (item[1][0], item[1][1], surf.get_width(), surf.get_height(), uvs[0], uvs[1], uvs[2], uvs[3], 1 if alpha == None else alpha / 255))
+                else:
+                    # consecutive functions share one overlay upload
+                    funcs.append(item)
+        if len(funcs):
+            self.render_functions(target, funcs, batch)
+        batch.flush()
+
+    def cycle(self, dest_surfs):
+        self.render_count = 0
+        self.draw_calls = 0
+        self.atlas.begin_frame()
+        if ('Assets' in self.e) and self.e['Assets'].atlas:
+            self.atlas.link(self.e['Assets'].atlas)
+        self.ctx.enable(moderngl.BLEND)
+        outputs = dict(dest_surfs)
+        for group in dest_surfs:
+            if group in self.render_queue:
+                target = self.target(group, dest_surfs[group])
+                self.render_target(target, self.render_queue[group])
+                outputs[group] = target.texture
+        self.ctx.disable(moderngl.BLEND)
+        self.reset()
+        return outputs
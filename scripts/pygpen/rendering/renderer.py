@@ -4,24 +4,48 @@ from ..utils.elements import ElementSingleton
 
 class Renderer(ElementSingleton):
     def __init__(self, groups=['default']):
-        super().__init__()
+        # backends subclass this and register under the same name
+        super().__init__(custom_id='Renderer')
         self.groups = groups
+        # group -> z -> items in insertion order. plain blits are (surf, pos) and functions are (func, args, kwargs).
         self.render_queue = {}
-        self.i = 0
+        # group -> layers that contain functions and can't be blitted in a single call
+        self.func_layers = {}
+        # z -> special_flags for the blits on that layer
+        self.blend_modes = {}
         self.render_count = 0
         self.reset()
         
     def set_groups(self, groups):
         self.groups = groups
         self.reset()
+        
+    # ex: set_blend_mode(107, pygame.BLEND_RGBA_ADD). functions on the layer are unaffected.
+    def set_blend_mode(self, z, special_flags=0):
+        if special_flags:
+            self.blend_modes[z] = special_flags
+        elif z in self.blend_modes:
+            del self.blend_modes[z]
     
     def reset(self):
         for group in self.groups:
-            self.render_queue[group] = []
+            self.render_queue[group] = {}
+            self.func_layers[group] = set()
     
     def blit(self, surf, pos, z=0, group='default'):
-        self.render_queue[group].append((z, self.i, surf, pos))
-        self.i += 1
+        layers = self.render_queue[group]
+        if z in layers:
+            layers[z].append((surf, pos))
+        else:
+            layers[z] = [(surf, pos)]
+            
+    # queues a sequence of (surf, pos) blits on one layer
+    def blits(self, blits, z=0, group='default'):
+        layers = self.render_queue[group]
+        if z in layers:
+            layers[z] += blits
+        else:
+            layers[z] = list(blits)
     
     # works with anything that takes the surface as the first argument
     def renderf(self, func, *args, **kwargs):
@@ -31,22 +55,43 @@ class Renderer(ElementSingleton):
             del kwargs['z']
         if 'group' in kwargs:
             del kwargs['group']
-        self.render_queue[group].append((z, self.i, func, args, kwargs))
-        self.i += 1
+        layers = self.render_queue[group]
+        if z in layers:
+            layers[z].append((func, args, kwargs))
+        else:
+            layers[z] = [(func, args, kwargs)]
+        self.func_layers[group].add(z)
+        
+    def blit_run(self, surf, blits, special_flags=0):
+        if special_flags:
+            blits = [(blit[0], blit[1], None, special_flags) for blit in blits]
+        surf.blits(blits, doreturn=False)
 
     def cycle(self, dest_surfs):
         self.render_count = 0
         for group in dest_surfs:
             if group in self.render_queue:
-                self.render_queue[group].sort()
-                self.render_count += len(self.render_queue[group])
-                for blit in self.render_queue[group]:
-                    if len(blit) > 4:
-                        blit[2](dest_surfs[group], *blit[3], **blit[4])
-                    else:
-                        if blit[0] != 107:
-                            dest_surfs[group].blit(blit[2], blit[3])
+                surf = dest_surfs[group]
+                layers = self.render_queue[group]
+                func_layers = self.func_layers[group]
+                for z in sorted(layers):
+                    queue = layers[z]
+                    self.render_count += len(queue)
+                    special_flags = self.blend_modes[z] if z in self.blend_modes else 0
+                    if z not in func_layers:
+                        self.blit_run(surf, queue, special_flags)
+                        continue
+                    # consecutive plain blits are batched between function calls
+                    run = []
+                    for item in queue:
+                        if len(item) == 2:
+                            run.append(item)
                         else:
-                            dest_surfs[group].blit(blit[2], blit[3], special_flags=pygame.BLEND_RGBA_ADD)
+                            if len(run):
+                                self.blit_run(surf, run, special_flags)
+                                run = []
+                            item[0](surf, *item[1], **item[2])
+                    if len(run):
+                        self.blit_run(surf, run, special_flags)
         self.reset()
         return dest_surfs
@@ -5,10 +5,13 @@ from threading import Timer
 from ..misc.errors import InvalidAsset
 from ..utils.elements import ElementSingleton
 from ..utils.io import recursive_file_op
+from ..assets.loader import loaded
+from ..assets.lazy import LazyDict, lazy_file_op
 
 class Sounds(ElementSingleton):
-    def __init__(self, path=None, filetype='wav'):
+    def __init__(self, path=None, filetype='wav', lazy=False):
         super().__init__()
+        self.lazy = lazy
         pygame.mixer.init()
         pygame.mixer.set_num_channels(64)
         self.path = path
@@ -19,14 +22,15 @@ class Sounds(ElementSingleton):
     
     def load(self, path):
         self.path = path
-        self.sounds = recursive_file_op(self.path, lambda x: pygame.mixer.Sound(x), filetype=self.filetype)
+        file_op = lazy_file_op if self.lazy else recursive_file_op
+        self.sounds = file_op(self.path, lambda x: loaded(x, pygame.mixer.Sound), filetype=self.filetype)
 
     def play(self, sound_id, volume=1.0, pan=0, times=0):
         sound_id_split = sound_id.split('/')
         s = self.sounds
         while len(sound_id_split):
             next_id = sound_id_split.pop(0)
-            if (type(s) == dict) and (next_id in s):
+            if (type(s) in {dict, LazyDict}) and (next_id in s):
                 s = s[next_id]
             else:
                 raise InvalidAsset(sound_id)
@@ -0,0 +1,50 @@
+import numpy as np
+
+# neighbor states packed 2 bits per check (3 is unused)
+NONE = 0
+SELF = 1
+OTHER = 2
+
+# the tags each state satisfies under the rule semantics of Tilemap.autotile_tile()
+STATE_TAGS = [{'none', 'notself'}, {'something', 'self'}, {'something', 'notself'}]
+RULE_TAGS = {'none', 'notself', 'something', 'self'}
+
+def compile_mapping(mapping, checks):
+    # rules that reference specific groups can't be expressed with the packed states
+    for tile_rules in mapping.values():
+        if tile_rules != 'default':
+            for rule in tile_rules:
+                if rule[2] not in RULE_TAGS:
+                    return None
+
+    check_index = {tuple(check): i for i, check in enumerate(checks)}
+    tile_types = list(mapping)
+    rules = [(i, tile_rules if tile_rules == 'default' else [(check_index[tuple(rule[:2])], rule[2]) for rule in tile_rules]) for i, tile_rules in enumerate(mapping.values())]
+
+    table = np.full(4 ** len(checks), -1, dtype=np.int16)
+    for mask in range(len(table)):
+        states = [(mask >> (i * 2)) & 3 for i in range(len(checks))]
+        if 3 in states:
+            continue
+        # later valid rules win just like the sequential scan
+        new_type = -1
+        for i, tile_rules in rules:
+            if tile_rules == 'default':
+                new_type = i
+            elif all(tag in STATE_TAGS[states[check]] for check, tag in tile_rules):
+                new_type = i
+        table[mask] = new_type
+
+    return tile_types, table
+
+def neighbor_masks(codes, edges, own, xs, ys, checks):
+    # codes is a padded grid of group indices (-1 for empty) and edges flags out of map cells with the same padding
+    masks = np.zeros(len(xs), dtype=np.int64)
+    for i, check in enumerate(checks):
+        nx = xs + check[0]
+        ny = ys + check[1]
+        neighbor = codes[ny, nx]
+        states = np.where(neighbor == -1, NONE, np.where(neighbor == own, SELF, OTHER))
+        states = np.where(edges[ny, nx], SELF, states)
+        masks |= states.astype(np.int64) << (i * 2)
+    return masks
@@ -0,0 +1,154 @@
+import json
+import struct
+
+from ..utils.io import read_tjson
+
+MAGIC = b'PMPB'
+VERSION = 1
+CHUNK_SIZE = 16
+
+# magic, version, tile width, tile height, map width, map height, chunk size
+HEADER = struct.Struct('<4sHHHiiH')
+COUNT = struct.Struct('<I')
+STRING_LEN = struct.Struct('<I')
+# chunk x, chunk y, record offset, grid tile count, off-grid tile count
+CHUNK_ENTRY = struct.Struct('<iiIII')
+# x, y, layer, group index, tile id, custom data index (-1 for none)
+GRID_RECORD = struct.Struct('<iihHhhi')
+# same as the grid record with float positions and a flag for integer positions
+OFFGRID_RECORD = struct.Struct('<ddhHhhiB')
+
+def chunk_loc(grid_pos, chunk_size=CHUNK_SIZE):
+    return (int(grid_pos[0] // chunk_size), int(grid_pos[1] // chunk_size))
+
+def pack_strings(strings):
+    data = [COUNT.pack(len(strings))]
+    for string in strings:
+        raw = string.encode('utf-8')
+        data.append(STRING_LEN.pack(len(raw)))
+        data.append(raw)
+    return b''.join(data)
+
+def unpack_strings(buf, offset):
+    count = COUNT.unpack_from(buf, offset)[0]
+    offset += COUNT.size
+    strings = []
+    for i in range(count):
+        length = STRING_LEN.unpack_from(buf, offset)[0]
+        offset += STRING_LEN.size
+        strings.append(bytes(buf[offset:offset + length]).decode('utf-8'))
+        offset += length
+    return strings, offset
+
+def write_binary_map(path, tile_size, dimensions, grid_tiles, offgrid_tiles, chunk_size=CHUNK_SIZE):
+    groups = {}
+    custom_data = {}
+    chunks = {}
+
+    def lookup(table, key):
+        if key not in table:
+            table[key] = len(table)
+        return table[key]
+
+    def custom_index(tile_data):
+        if 'c' in tile_data:
+            return lookup(custom_data, json.dumps(tile_data['c']))
+        return -1
+
+    for tile_data in grid_tiles:
+        loc = chunk_loc(tile_data['pos'], chunk_size)
+        if loc not in chunks:
+            chunks[loc] = ([], [])
+        chunks[loc][0].append(GRID_RECORD.pack(tile_data['pos'][0], tile_data['pos'][1], tile_data['layer'], lookup(groups, tile_data['group']), tile_data['tile_id'][0], tile_data['tile_id'][1], custom_index(tile_data)))
+
+    for tile_data in offgrid_tiles:
+        pos = tile_data['pos']
+        loc = chunk_loc((pos[0] / tile_size[0], pos[1] / tile_size[1]), chunk_size)
+        if loc not in chunks:
+            chunks[loc] = ([], [])
+        int_pos = (type(pos[0]) == int) and (type(pos[1]) == int)
+        chunks[loc][1].append(OFFGRID_RECORD.pack(pos[0], pos[1], tile_data['layer'], lookup(groups, tile_data['group']), tile_data['tile_id'][0], tile_data['tile_id'][1], custom_index(tile_data), int_pos))
+
+    header = HEADER.pack(MAGIC, VERSION, tile_size[0], tile_size[1], dimensions[0], dimensions[1], chunk_size)
+    tables = pack_strings(list(groups)) + pack_strings(list(custom_data))
+
+    # records are stored contiguously per chunk so that a chunk can be read with a single slice
+    index = [COUNT.pack(len(chunks))]
+    records = []
+    offset = len(header) + len(tables) + COUNT.size + CHUNK_ENTRY.size * len(chunks)
+    for loc in sorted(chunks, key=lambda x: (x[1], x[0])):
+        grid_records, offgrid_records = chunks[loc]
+        index.append(CHUNK_ENTRY.pack(loc[0], loc[1], offset, len(grid_records), len(offgrid_records)))
+        records += grid_records + offgrid_records
+        offset += GRID_RECORD.size * len(grid_records) + OFFGRID_RECORD.size * len(offgrid_records)
+
+    f = open(path, 'wb')
+    f.write(header + tables + b''.join(index) + b''.join(records))
+    f.close()
+
+def convert_pmap(pmap_path, path, chunk_size=CHUNK_SIZE):
+    data = read_tjson(pmap_path)
+    grid_tiles = [tile_data for loc in data['grid_tiles'] for tile_data in data['grid_tiles'][loc].values()]
+    offgrid_tiles = list(data['offgrid_tiles']['objects'].values())
+    write_binary_map(path, data['tile_size'], data['dimensions'], grid_tiles, offgrid_tiles, chunk_size=chunk_size)
+
+class BinaryMap:
+    def __init__(self, path):
+        self.path = path
+        f = open(path, 'rb')
+        self.buf = memoryview(f.read())
+        f.close()
+
+        magic, version, tile_w, tile_h, dim_w, dim_h, self.chunk_size = HEADER.unpack_from(self.buf, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a binary map.")
+        if version != VERSION:
+            raise ValueError(f"{path} uses unsupported binary map version {version}.")
+        self.tile_size = (tile_w, tile_h)
+        self.dimensions = (dim_w, dim_h)
+
+        offset = HEADER.size
+        self.groups, offset = unpack_strings(self.buf, offset)
+        self.custom_data, offset = unpack_strings(self.buf, offset)
+        self.custom_data = [json.loads(v) for v in self.custom_data]
+
+        self.chunks = {}
+        count = COUNT.unpack_from(self.buf, offset)[0]
+        offset += COUNT.size
+        for entry in CHUNK_ENTRY.iter_unpack(self.buf[offset:offset + CHUNK_ENTRY.size * count]):
+            self.chunks[(entry[0], entry[1])] = entry[2:]
+
+    def chunk(self, loc):
+        grid_tiles = []
+        offgrid_tiles = []
+        if loc not in self.chunks:
+            return grid_tiles, offgrid_tiles
+        offset, grid_count, offgrid_count = self.chunks[loc]
+        groups = self.groups
+        custom_data = self.custom_data
+
+        end = offset + GRID_RECORD.size * grid_count
+        for x, y, layer, group, tile_x, tile_y, custom in GRID_RECORD.iter_unpack(self.buf[offset:end]):
+            tile_data = {'group': groups[group], 'tile_id': (tile_x, tile_y), 'pos': (x, y), 'layer': layer}
+            if custom != -1:
+                tile_data['c'] = custom_data[custom]
+            grid_tiles.append(tile_data)
+
+        offset = end
+        end = offset + OFFGRID_RECORD.size * offgrid_count
+        for x, y, layer, group, tile_x, tile_y, custom, int_pos in OFFGRID_RECORD.iter_unpack(self.buf[offset:end]):
+            tile_data = {'group': groups[group], 'tile_id': (tile_x, tile_y), 'pos': (int(x), int(y)) if int_pos else (x, y), 'layer': layer}
+            if custom != -1:
+                tile_data['c'] = custom_data[custom]
+            offgrid_tiles.append(tile_data)
+
+        return grid_tiles, offgrid_tiles
+
+    def tiles(self):
+        grid_tiles = []
+        offgrid_tiles = []
+        for loc in self.chunks:
+            chunk_grid, chunk_offgrid = self.chunk(loc)
+            grid_tiles += chunk_grid
+            offgrid_tiles += chunk_offgrid
+        return grid_tiles, offgrid_tiles
@@ -0,0 +1,168 @@
+import math
+
+import numpy as np
+
+# walks the grid cells crossed by a segment in order (Amanatides & Woo) and yields (grid_pos, t_enter, t_exit, entry_axis)
+# t is the fraction of the segment and entry_axis is None for the starting cell
+def traverse(start, end, tile_size):
+    dx = end[0] - start[0]
+    dy = end[1] - start[1]
+    cx = int(start[0] // tile_size[0])
+    cy = int(start[1] // tile_size[1])
+    step_x = 1 if dx > 0 else -1
+    step_y = 1 if dy > 0 else -1
+    t_delta_x = tile_size[0] / abs(dx) if dx else math.inf
+    t_delta_y = tile_size[1] / abs(dy) if dy else math.inf
+    t_max_x = ((cx + (dx > 0)) * tile_size[0] - start[0]) / dx if dx else math.inf
+    t_max_y = ((cy + (dy > 0)) * tile_size[1] - start[1]) / dy if dy else math.inf
+    t = 0
+    axis = None
+    while True:
+        t_exit = min(t_max_x, t_max_y, 1)
+        yield (cx, cy), t, t_exit, axis
+        if t_exit >= 1:
+            return
+        if t_max_x < t_max_y:
+            t = t_max_x
+            cx += step_x
+            t_max_x += t_delta_x
+            axis = 0
+        else:
+            t = t_max_y
+            cy += step_y
+            t_max_y += t_delta_y
+            axis = 1
+            
+def entry_normal(axis, delta):
+    if axis == 0:
+        return (-1 if delta[0] > 0 else 1, 0)
+    if axis == 1:
+        return (0, -1 if delta[1] > 0 else 1)
+    return (0, 0)
+
+def ramp_normal(physics_type, tile_size):
+    length = math.sqrt(tile_size[0] ** 2 + tile_size[1] ** 2)
+    if physics_type == 'rampr':
+        return (-tile_size[1] / length, -tile_size[0] / length)
+    return (tile_size[1] / length, -tile_size[0] / length)
+
+# vertical distance below the ramp surface (positive inside the solid part) at fraction t of the segment
+def ramp_depth(physics_type, grid_pos, tile_size, start, delta, t):
+    x = min(max((start[0] + delta[0] * t) / tile_size[0] - grid_pos[0], 0), 1)
+    y = start[1] + delta[1] * t
+    if physics_type == 'rampr':
+        return y - (grid_pos[1] + 1 - x) * tile_size[1]
+    return y - (grid_pos[1] + x) * tile_size[1]
+
+# returns (t, normal) for where the segment first becomes blocked within a cell or None
+def cell_hit(physics_type, grid_pos, t_enter, t_exit, axis, start, delta, tile_size, dropthrough=True):
+    if physics_type == 'solid':
+        return t_enter, entry_normal(axis, delta)
+    if physics_type == 'dropthrough':
+        # platforms only block from above
+        if dropthrough and (axis == 1) and (delta[1] > 0):
+            return t_enter, (0, -1)
+        return None
+    if physics_type in {'rampr', 'rampl'}:
+        depth_enter = ramp_depth(physics_type, grid_pos, tile_size, start, delta, t_enter)
+        if depth_enter >= 0:
+            return t_enter, entry_normal(axis, delta)
+        depth_exit = ramp_depth(physics_type, grid_pos, tile_size, start, delta, t_exit)
+        if depth_exit >= 0:
+            return t_enter + (t_exit - t_enter) * -depth_enter / (depth_exit - depth_enter), ramp_normal(physics_type, tile_size)
+    return None
+
+def raycast(tilemap, start, end, dropthrough=True):
+    delta = (end[0] - start[0], end[1] - start[1])
+    for grid_pos, t_enter, t_exit, axis in traverse(start, end, tilemap.tile_size):
+        if grid_pos in tilemap.physics_map:
+            tile = tilemap.physics_map[grid_pos][0][2]
+            hit = cell_hit(tile.physics_type, grid_pos, t_enter, t_exit, axis, start, delta, tilemap.tile_size, dropthrough=dropthrough)
+            if hit:
+                return (start[0] + delta[0] * hit[0], start[1] + delta[1] * hit[0]), tile, hit[1]
+    return None
+
+def sweep_segment(tilemap, start, end):
+    tiles = []
+    for grid_pos, t_enter, t_exit, axis in traverse(start, end, tilemap.tile_size):
+        if grid_pos in tilemap.physics_map:
+            tiles.append(tilemap.physics_map[grid_pos][0][2])
+    return tiles
+
+def raycast_many(tilemap, starts, ends, dropthrough=True):
+    starts = np.asarray(starts, dtype=np.float64).reshape(-1, 2)
+    ends = np.asarray(ends, dtype=np.float64).reshape(-1, 2)
+    tile_size = np.array(tilemap.tile_size, dtype=np.float64)
+    count = len(starts)
+    delta = ends - starts
+    
+    cells = np.floor_divide(starts, tile_size).astype(np.int64)
+    steps = np.where(delta > 0, 1, -1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t_delta = np.where(delta != 0, tile_size / np.abs(delta), np.inf)
+        t_max = np.where(delta != 0, ((cells + (delta > 0)) * tile_size - starts) / delta, np.inf)
+    t_enter = np.zeros(count)
+    axes = np.full(count, -1)
+    
+    hits = np.zeros(count, dtype=bool)
+    hit_t = np.ones(count)
+    normals = np.zeros((count, 2))
+    
+    ids = tilemap.physics_ids
+    length = math.sqrt(tilemap.tile_size[0] ** 2 + tilemap.tile_size[1] ** 2)
+    ramp_normals = {ids['rampr']: (-tilemap.tile_size[1] / length, -tilemap.tile_size[0] / length), ids['rampl']: (tilemap.tile_size[1] / length, -tilemap.tile_size[0] / length)}
+    
+    active = np.arange(count)
+    while len(active):
+        cell = cells[active]
+        t0 = t_enter[active]
+        t1 = np.minimum(t_max[active].min(axis=1), 1)
+        axis = axes[active]
+        d = delta[active]
+        
+        types = tilemap.physics_cell_ids(cell[:, 0], cell[:, 1])
+        
+        entry = np.zeros((len(active), 2))
+        entry[axis == 0, 0] = np.where(d[axis == 0, 0] > 0, -1, 1)
+        entry[axis == 1, 1] = np.where(d[axis == 1, 1] > 0, -1, 1)
+        
+        blocked = types == ids['solid']
+        t = t0.copy()
+        normal = entry.copy()
+        if dropthrough:
+            blocked |= (types == ids['dropthrough']) & (axis == 1) & (d[:, 1] > 0)
+            
+        for ramp_id, ramp_n in ramp_normals.items():
+            ramp = types == ramp_id
+            if ramp.any():
+                def depth(t):
+                    x = np.clip((starts[active, 0] + d[:, 0] * t) / tile_size[0] - cell[:, 0], 0, 1)
+                    y = starts[active, 1] + d[:, 1] * t
+                    if ramp_id == ids['rampr']:
+                        return y - (cell[:, 1] + 1 - x) * tile_size[1]
+                    return y - (cell[:, 1] + x) * tile_size[1]
+                depth_enter = depth(t0)
+                depth_exit = depth(t1)
+                inside = ramp & (depth_enter >= 0)
+                surface = ramp & (depth_enter < 0) & (depth_exit >= 0)
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    t = np.where(surface, t0 + (t1 - t0) * -depth_enter / (depth_exit - depth_enter), t)
+                normal[surface] = ramp_n
+                blocked |= inside | surface
+                
+        hit_rays = active[blocked]
+        hits[hit_rays] = True
+        hit_t[hit_rays] = t[blocked]
+        normals[hit_rays] = normal[blocked]
+        
+        # step the remaining rays into their next cell
+        remaining = (~blocked) & (t1 < 1)
+        active = active[remaining]
+        axis = (t_max[active, 1] <= t_max[active, 0]).astype(np.int64)
+        t_enter[active] = t_max[active, axis]
+        cells[active, axis] += steps[active, axis]
+        t_max[active, axis] += t_delta[active, axis]
+        axes[active] = axis
+        
+    points = starts + delta * hit_t[:, np.newaxis]
+    return hits, points, normals
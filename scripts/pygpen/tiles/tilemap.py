@@ -1,31 +1,92 @@
+import numpy as np
 import pygame
 
-from ..utils.elements import Element
+from ..utils.elements import Element, elems
 from ..utils.io import read_tjson, write_tjson
 from ..data_structures.quads import Quads
+from .binary_map import BinaryMap, write_binary_map, convert_pmap, chunk_loc, CHUNK_SIZE
+from .autotile import neighbor_masks
+from .visible_set import VisibleSet
+from .raycast import raycast, raycast_many, sweep_segment
 
 BORDERS = [(-1, 0), (-1, -1), (0, -1), (1, -1), (1, 0), (1, 1), (0, 1), (-1, 1), (0, 0)]
 
 def basic_tile_render(tile, offset=(0, 0), group='default'):
     tile.e['Renderer'].blit(tile.img, (tile.raw_pos[0] + tile.offset[0] - offset[0], tile.raw_pos[1] + tile.offset[1] - offset[1]), z=tile.layer, group=group)
 
+def tile_from_data(tile_data):
+    return Tile(tile_data['group'], tile_id=tuple(tile_data['tile_id']), pos=tuple(tile_data['pos']), layer=tile_data['layer'], custom_data=tile_data['c'] if 'c' in tile_data else '')
+
+# data shared by every tile with the same group and tile_id
+class TileType:
+    __slots__ = ('group', 'tile_id', 'img', 'config', 'flags', 'offset', 'render_func')
+    
+    def __init__(self, group, tile_id):
+        assets = elems['Assets']
+        self.group = group
+        self.tile_id = tile_id
+        self.img = assets.spritesheets[group]['assets'][tile_id]
+        self.config = assets.spritesheets[group]['config'][tile_id]
+        self.flags = frozenset(self.config['flags'] if 'flags' in self.config else ['solid'])
+        self.offset = self.config['offset']
+        self.render_func = assets.custom_tile_renderers[group] if group in assets.custom_tile_renderers else basic_tile_render
+        
+def get_tile_type(group, tile_id):
+    tile_types = elems['Assets'].tile_types
+    key = (group, tile_id)
+    if key not in tile_types:
+        tile_types[key] = TileType(group, tile_id)
+    return tile_types[key]
+
 class Tile(Element):
+    # per-tile state only. the remaining attributes are views of the shared TileType.
+    # Element doesn't define slots, so ad-hoc attributes (like the water renderer's) still work.
+    __slots__ = ('tile_type', 'grid_pos', 'raw_pos', 'layer', 'rect', 'map', 'physics_type', 'custom_data', 'quad_ids')
+    e = elems
+    register = False
+    _name = 'Tile'
+    _singleton = False
+    
     def __init__(self, group, tile_id=(0, 0), pos=(0, 0), layer=0, custom_data=''):
-        super().__init__()
-        self.group = group
-        self.render_func = basic_tile_render
-        self.change_id(tile_id)
+        self.tile_type = get_tile_type(group, tuple(tile_id))
         self.grid_pos = tuple(pos)
-        self.raw_pos = tuple(pos)
+        self.raw_pos = self.grid_pos
         self.layer = layer
-        self.rect = pygame.Rect(*pos, *self.img.get_size())
+        self.rect = pygame.Rect(*pos, *self.tile_type.img.get_size())
         self.map = None
-        self.flags = set(self.config['flags'] if 'flags' in self.config else ['solid'])
         self.physics_type = None
         self.custom_data = custom_data
         
+    @property
+    def group(self):
+        return self.tile_type.group
+    
+    @property
+    def tile_id(self):
+        return self.tile_type.tile_id
+    
+    @property
+    def img(self):
+        return self.tile_type.img
+    
+    @property
+    def config(self):
+        return self.tile_type.config
+    
+    @property
+    def flags(self):
+        return self.tile_type.flags
+    
+    @property
+    def offset(self):
+        return self.tile_type.offset
+    
+    @property
+    def render_func(self):
+        return self.tile_type.render_func
+        
     def render(self, offset=(0, 0), group='default'):
-        self.render_func(self, offset=offset, group=group)
+        self.tile_type.render_func(self, offset=offset, group=group)
     
     def primitive_render(self, surf, offset=(0, 0)):
         surf.blit(self.img, (self.raw_pos[0] + self.offset[0] - offset[0], self.raw_pos[1] + self.offset[1] - offset[1]))
@@ -34,12 +95,7 @@ class Tile(Element):
         return Tile(self.group, tile_id=self.tile_id, pos=pos, layer=self.layer)
 
     def change_id(self, tile_id):
-        self.tile_id = tile_id
-        self.img = self.e['Assets'].spritesheets[self.group]['assets'][tile_id]
-        self.config = self.e['Assets'].spritesheets[self.group]['config'][tile_id]
-        if self.group in self.e['Assets'].custom_tile_renderers:
-            self.render_func = self.e['Assets'].custom_tile_renderers[self.group]
-        self.offset = self.config['offset']
+        self.tile_type = get_tile_type(self.tile_type.group, tuple(tile_id))
         
     def export(self):
         data = {'group': self.group, 'tile_id': self.tile_id, 'pos': self.grid_pos, 'layer': self.layer}
@@ -50,9 +106,9 @@ class Tile(Element):
     def attach(self, tilemap, ongrid=True):
         if ongrid:
             self.raw_pos = (self.grid_pos[0] * tilemap.tile_size[0], self.grid_pos[1] * tilemap.tile_size[1])
-            self.rect = pygame.Rect(*self.raw_pos, *tilemap.tile_size)
+            self.rect.update(self.raw_pos, tilemap.tile_size)
         self.map = tilemap
-        for flag in self.flags:
+        for flag in self.tile_type.flags:
             if flag in tilemap.physics_priority:
                 self.physics_type = flag
 
@@ -74,8 +130,22 @@ class Tilemap(Element):
         self.physics_priority = {'solid': 1.0, 'dropthrough': 0.9, 'rampr': 0.8, 'rampl': 0.7}
         self.dimensions = tuple(dimensions)
         self.demensional_lock = True
+        self.baked = False
+        self.bake_size = 16
+        self.dense_physics = False
+        self.incremental_autotile = False
+        self.view_cache = False
         self.reset()
         
+    # physics types as the small integers used by the batched queries (0 for no tile)
+    @property
+    def physics_ids(self):
+        return {physics_type: i + 1 for i, physics_type in enumerate(self.physics_priority)}
+    
+    @property
+    def physics_id_types(self):
+        return [None] + list(self.physics_priority)
+        
     @property
     def world_dimensions(self):
         return (self.dimensions[0] * self.tile_size[0], self.dimensions[1] * self.tile_size[1])
@@ -85,6 +155,14 @@ class Tilemap(Element):
         self.physics_map = {}
         self.offgrid_tiles = Quads((self.tile_size[0] + self.tile_size[1]) * 3)
         self.i = 0
+        self.stream_source = None
+        self.stream_hook = None
+        self.loaded_chunks = {}
+        self.baked_chunks = {}
+        self.physics_grid = None
+        self.physics_tiles = None
+        self.autotile_dirty = set()
+        self.visible = VisibleSet(self, basic_tile_render)
         
     def save(self, path):
         output = {'tile_size': self.tile_size, 'grid_tiles': {}, 'offgrid_tiles': self.offgrid_tiles.export(lambda x: x.export()), 'dimensions': self.dimensions}
@@ -94,56 +172,146 @@ class Tilemap(Element):
                 output['grid_tiles'][loc][layer] = self.grid_tiles[loc][layer].export()
         write_tjson(path, output)
         
+    def save_binary(self, path, chunk_size=CHUNK_SIZE):
+        grid_tiles = [tile.export() for loc in self.grid_tiles for tile in self.grid_tiles[loc].values()]
+        offgrid_tiles = [tile.export() for tile in self.offgrid_tiles.objects.values()]
+        write_binary_map(path, self.tile_size, self.dimensions, grid_tiles, offgrid_tiles, chunk_size=chunk_size)
+
+    # converts a .pmap file to a binary map without building any tiles
+    @staticmethod
+    def convert_pmap(pmap_path, path, chunk_size=CHUNK_SIZE):
+        convert_pmap(pmap_path, path, chunk_size=chunk_size)
+        
+    # matches pygame.Rect.collidepoint() (including truncation of float positions) without allocating a rect
     def in_map(self, gridpos):
-        dimensions_r = pygame.Rect(0, 0, *self.dimensions)
-        return dimensions_r.collidepoint(gridpos)
+        return (-1 < gridpos[0] < self.dimensions[0]) and (-1 < gridpos[1] < self.dimensions[1])
 
     def inject(self, tilemap, offset=(0, 0), spawn_hook=lambda tile_data, ongrid: True):
+        grid_tiles = []
         for loc in tilemap.grid_tiles:
             for tile in tilemap.grid_tiles[loc].values():
                 tile = tile.shift_clone((tile.grid_pos[0] + offset[0], tile.grid_pos[1] + offset[1]))
                 if spawn_hook(tile.export(), True):
-                    self.insert(tile, ongrid=True)
+                    grid_tiles.append(tile)
+        self.insert_many(grid_tiles, ongrid=True)
+        offgrid_tiles = []
         for tile in tilemap.offgrid_tiles.objects.values():
             tile = tile.shift_clone((tile.grid_pos[0] + offset[0] * self.tile_size[0], tile.grid_pos[1] + offset[1] * self.tile_size[1]))
             if spawn_hook(tile.export(), False):
-                self.insert(tile, ongrid=False)
+                offgrid_tiles.append(tile)
+        self.insert_many(offgrid_tiles, ongrid=False)
     
     def load(self, path, spawn_hook=lambda tile_data, ongrid: True):
         data = read_tjson(path)
         self.reset()
         self.tile_size = tuple(data['tile_size'])
         self.dimensions = tuple(data['dimensions'])
-        for loc in data['grid_tiles']:
-            for layer in data['grid_tiles'][loc]:
-                tile_data = data['grid_tiles'][loc][layer]
-                if spawn_hook(tile_data, True):
-                    self.insert(Tile(tile_data['group'], tile_id=tuple(tile_data['tile_id']), pos=tuple(tile_data['pos']), layer=tile_data['layer'], custom_data=tile_data['c'] if 'c' in tile_data else ''))
-        for tile_data in data['offgrid_tiles']['objects'].values():
-            if spawn_hook(tile_data, False):
-                self.insert(Tile(tile_data['group'], tile_id=tuple(tile_data['tile_id']), pos=tuple(tile_data['pos']), layer=tile_data['layer'], custom_data=tile_data['c'] if 'c' in tile_data else ''), ongrid=False)
-    
-    def insert(self, tile, ongrid=True):
-        tile.attach(self, ongrid=ongrid)
-        dimensions_r = pygame.Rect(0, 0, *self.dimensions)
+        if self.dense_physics:
+            self.build_physics_grid()
+        grid_tiles = [tile_data for loc in data['grid_tiles'] for tile_data in data['grid_tiles'][loc].values()]
+        self.insert_many([tile_from_data(tile_data) for tile_data in grid_tiles if spawn_hook(tile_data, True)], autotile=False)
+        self.insert_many([tile_from_data(tile_data) for tile_data in data['offgrid_tiles']['objects'].values() if spawn_hook(tile_data, False)], ongrid=False)
+                
+    def load_binary(self, path, spawn_hook=lambda tile_data, ongrid: True):
+        bmap = BinaryMap(path)
+        self.reset()
+        self.tile_size = bmap.tile_size
+        self.dimensions = bmap.dimensions
+        if self.dense_physics:
+            self.build_physics_grid()
+        grid_tiles, offgrid_tiles = bmap.tiles()
+        self.insert_many([tile_from_data(tile_data) for tile_data in grid_tiles if spawn_hook(tile_data, True)], autotile=False)
+        self.insert_many([tile_from_data(tile_data) for tile_data in offgrid_tiles if spawn_hook(tile_data, False)], ongrid=False)
+                
+    # loads chunks from a binary map on demand instead of all at once (see stream_update())
+    def stream(self, path, spawn_hook=lambda tile_data, ongrid: True, chunk_budget=64):
+        bmap = BinaryMap(path)
+        self.reset()
+        self.tile_size = bmap.tile_size
+        self.dimensions = bmap.dimensions
+        if self.dense_physics:
+            self.build_physics_grid()
+        self.stream_source = bmap
+        self.stream_hook = spawn_hook
+        self.chunk_budget = chunk_budget
+        
+    def load_chunk(self, loc):
+        grid_data, offgrid_data = self.stream_source.chunk(loc)
+        grid_tiles = self.insert_many([tile_from_data(tile_data) for tile_data in grid_data if self.stream_hook(tile_data, True)], autotile=False)
+        offgrid_tiles = self.insert_many([tile_from_data(tile_data) for tile_data in offgrid_data if self.stream_hook(tile_data, False)], ongrid=False)
+        self.loaded_chunks[loc] = (grid_tiles, offgrid_tiles)
+        
+    def unload_chunk(self, loc):
+        if loc in self.loaded_chunks:
+            grid_tiles, offgrid_tiles = self.loaded_chunks.pop(loc)
+            for tile in grid_tiles:
+                self.remove_tile(tile)
+            for tile in offgrid_tiles:
+                self.offgrid_tiles.delete(tile)
+                
+    # rect is the area that must be resident in world space (usually the camera's view)
+    def stream_update(self, rect, padding=1):
+        chunk_size = self.stream_source.chunk_size
+        topleft = chunk_loc((rect[0] // self.tile_size[0], rect[1] // self.tile_size[1]), chunk_size)
+        bottomright = chunk_loc(((rect[0] + rect[2]) // self.tile_size[0], (rect[1] + rect[3]) // self.tile_size[1]), chunk_size)
+        required = set()
+        for y in range(topleft[1] - padding, bottomright[1] + padding + 1):
+            for x in range(topleft[0] - padding, bottomright[0] + padding + 1):
+                loc = (x, y)
+                if loc in self.stream_source.chunks:
+                    required.add(loc)
+                    if loc in self.loaded_chunks:
+                        # move to the back of the LRU order
+                        self.loaded_chunks[loc] = self.loaded_chunks.pop(loc)
+                    else:
+                        self.load_chunk(loc)
+                        
+        # evict the least recently used chunks that aren't required
+        if len(self.loaded_chunks) > self.chunk_budget:
+            for loc in list(self.loaded_chunks):
+                if len(self.loaded_chunks) <= self.chunk_budget:
+                    break
+                if loc not in required:
+                    self.unload_chunk(loc)
+    
+    def insert(self, tile, ongrid=True, autotile=True):
+        return len(self.insert_many([tile], ongrid=ongrid, autotile=autotile)) == 1
+    
+    # inserts a batch of tiles and returns the ones that were within bounds
+    def insert_many(self, tiles, ongrid=True, autotile=True):
+        inserted = []
         if ongrid:
-            if self.demensional_lock and (not dimensions_r.collidepoint(tile.grid_pos)):
-                return
-            if tile.grid_pos not in self.grid_tiles:
-                self.grid_tiles[tile.grid_pos] = {}
-            self.grid_tiles[tile.grid_pos][tile.layer] = tile
-            if tile.physics_type:
-                if tile.grid_pos not in self.physics_map:
-                    self.physics_map[tile.grid_pos] = []
-                self.physics_map[tile.grid_pos].append((self.physics_priority[tile.physics_type], self.i, tile))
-                self.physics_map[tile.grid_pos].sort(reverse=True)
-                self.i += 1
+            physics_cells = set()
+            for tile in tiles:
+                tile.attach(self, ongrid=True)
+                grid_pos = tile.grid_pos
+                if self.demensional_lock and (not self.in_map(grid_pos)):
+                    continue
+                if grid_pos not in self.grid_tiles:
+                    self.grid_tiles[grid_pos] = {}
+                self.grid_tiles[grid_pos][tile.layer] = tile
+                self.invalidate(grid_pos)
+                if autotile:
+                    self.mark_autotile(grid_pos, [tile.layer])
+                if tile.physics_type:
+                    if grid_pos not in self.physics_map:
+                        self.physics_map[grid_pos] = []
+                    self.physics_map[grid_pos].append((self.physics_priority[tile.physics_type], self.i, tile))
+                    self.i += 1
+                    physics_cells.add(grid_pos)
+                inserted.append(tile)
+            # each touched cell only needs to be sorted once
+            for grid_pos in physics_cells:
+                self.physics_map[grid_pos].sort(reverse=True)
+                self.sync_physics(grid_pos)
         else:
-            pos = (tile.raw_pos[0] / self.tile_size[0], tile.raw_pos[1] / self.tile_size[1])
-            if self.demensional_lock and (not dimensions_r.collidepoint(pos)):
-                return
-            self.offgrid_tiles.add_raw(tile, tile.rect, tag=True)
-        return True
+            for tile in tiles:
+                tile.attach(self, ongrid=False)
+                if self.demensional_lock and (not self.in_map((tile.raw_pos[0] / self.tile_size[0], tile.raw_pos[1] / self.tile_size[1]))):
+                    continue
+                self.offgrid_tiles.add_raw(tile, tile.rect, tag=True)
+                inserted.append(tile)
+        return inserted
             
     def area_masks(self, rect):
         surfs = {}
@@ -158,31 +326,53 @@ class Tilemap(Element):
         masks = {layer: pygame.mask.from_surface(surfs[layer]) for layer in surfs}
         return masks
     
-    # could be made faster by using offsets for each tile test instead of a whole area mask
     def optimize_area(self, rect, layer=0):
-        masks = self.area_masks(rect)
-        layer_ids = sorted(list(masks))
-        if layer in masks:
-            involved_layers = layer_ids[layer_ids.index(layer) + 1:]
-            if len(involved_layers):
-                # bitwise OR all layers above together
-                combined_mask = masks[involved_layers[0]]
-                for top_layer in involved_layers[1:]:
-                    combined_mask.draw(masks[top_layer], (0, 0))
-                # get map of open space
-                combined_mask.invert()
-                for loc in self.rect_grid_locs(rect):
-                    if loc in self.grid_tiles:
-                        if layer in self.grid_tiles[loc]:
-                            surf = pygame.Surface(rect.size, pygame.SRCALPHA)
-                            tile = self.grid_tiles[loc][layer]
-                            tile.primitive_render(surf, offset=rect.topleft)
-                            tile_mask = pygame.mask.from_surface(surf)
-                            if not tile_mask.overlap_area(combined_mask, (0, 0)):
-                                # the tile is not visible
-                                self.grid_delete(loc, layer=layer)
+        tiles = []
+        for loc in self.rect_grid_locs(rect):
+            if loc in self.grid_tiles:
+                if layer in self.grid_tiles[loc]:
+                    tiles.append(self.grid_tiles[loc][layer])
+        return self.cull_tiles(tiles)
+    
+    # removes every grid tile that's fully covered by higher layers and returns the number removed
+    def optimize(self):
+        return self.cull_tiles([tile for loc in self.grid_tiles.values() for tile in loc.values()])
+    
+    def cull_tiles(self, tiles):
+        # how many cells away a tile image can reach
+        reach = [1, 1]
+        for group in self.e['Assets'].spritesheets.values():
+            for tile_id, img in group['assets'].items():
+                offset = group['config'][tile_id]['offset']
+                reach[0] = max(reach[0], (img.get_width() + abs(offset[0])) // self.tile_size[0] + 1)
+                reach[1] = max(reach[1], (img.get_height() + abs(offset[1])) // self.tile_size[1] + 1)
+                
+        culled = [tile for tile in tiles if self.occluded(tile, reach)]
+        for tile in culled:
+            self.grid_delete(tile.grid_pos, layer=tile.layer)
+        return len(culled)
+    
+    def occluded(self, tile, reach=(1, 1)):
+        tile_mask, tile_count = self.e['Assets'].tile_mask(tile.group, tile.tile_id)
+        if not tile_count:
+            return False
+        pos = (tile.raw_pos[0] + tile.offset[0], tile.raw_pos[1] + tile.offset[1])
+        tile_r = pygame.Rect(*pos, *tile_mask.get_size())
+        cover = None
+        for y in range(tile_r.top // self.tile_size[1] - reach[1], (tile_r.bottom - 1) // self.tile_size[1] + reach[1] + 1):
+            for x in range(tile_r.left // self.tile_size[0] - reach[0], (tile_r.right - 1) // self.tile_size[0] + reach[0] + 1):
+                if (x, y) in self.grid_tiles:
+                    for layer, other in self.grid_tiles[(x, y)].items():
+                        if layer > tile.layer:
+                            other_pos = (other.raw_pos[0] + other.offset[0], other.raw_pos[1] + other.offset[1])
+                            if tile_r.colliderect((*other_pos, *other.img.get_size())):
+                                if not cover:
+                                    cover = pygame.mask.Mask(tile_r.size)
+                                cover.draw(self.e['Assets'].tile_mask(other.group, other.tile_id)[0], (other_pos[0] - pos[0], other_pos[1] - pos[1]))
+        if not cover:
+            return False
+        return tile_mask.overlap_area(cover, (0, 0)) == tile_count
 
-    # could be faster by looking up with neighbor info
     def autotile(self, rect=None, layer=0):
         if rect:
             locs = []
@@ -191,74 +381,284 @@ class Tilemap(Element):
                     locs.append(self.grid_tiles[loc])
         else:
             locs = [loc for loc in self.grid_tiles.values()]
-        for loc in locs:
-            if layer in loc:
+        self.autotile_tiles([loc[layer] for loc in locs if layer in loc])
+        
+    # queues tiles affected by edits so that flush_autotile() only re-evaluates those
+    def set_incremental_autotile(self, enabled=True):
+        self.incremental_autotile = enabled
+        self.autotile_dirty = set()
+        if enabled:
+            checks = self.e['Assets'].autotile_config['checks']
+            self.autotile_offsets = set(offset for assignment in checks for offset in checks[assignment])
+            self.autotile_offsets.add((0, 0))
+        
+    def mark_autotile(self, grid_pos, layers):
+        if self.incremental_autotile:
+            for layer in layers:
+                for offset in self.autotile_offsets:
+                    self.autotile_dirty.add(((grid_pos[0] - offset[0], grid_pos[1] - offset[1]), layer))
+                    
+    def flush_autotile(self):
+        tiles = []
+        for grid_pos, layer in self.autotile_dirty:
+            if (grid_pos in self.grid_tiles) and (layer in self.grid_tiles[grid_pos]):
+                tiles.append(self.grid_tiles[grid_pos][layer])
+        self.autotile_dirty = set()
+        self.autotile_tiles(tiles)
+        return len(tiles)
+        
+    def autotile_tiles(self, tiles):
+        config = self.e['Assets'].autotile_config
+        batches = {}
+        for tile in tiles:
+            if tile.group in config['assignment']:
+                assignment = config['assignment'][tile.group]
+                if config['tables'][assignment]:
+                    if (assignment, tile.layer) not in batches:
+                        batches[(assignment, tile.layer)] = []
+                    batches[(assignment, tile.layer)].append(tile)
+                else:
+                    self.autotile_tile(tile)
+        for (assignment, layer), batch in batches.items():
+            self.autotile_batch(batch, assignment, layer)
+            
+    def autotile_batch(self, tiles, assignment, layer):
+        config = self.e['Assets'].autotile_config
+        checks = config['checks'][assignment]
+        tile_types, table = config['tables'][assignment]
+        pad = max([max(abs(check[0]), abs(check[1])) for check in checks] + [0])
+        
+        xs = np.array([tile.grid_pos[0] for tile in tiles])
+        ys = np.array([tile.grid_pos[1] for tile in tiles])
+        left = int(xs.min()) - pad
+        top = int(ys.min()) - pad
+        width = int(xs.max()) + pad - left + 1
+        height = int(ys.max()) + pad - top + 1
+        
+        # fill a group index grid covering the batch, padded by the reach of the checks
+        group_ids = {}
+        codes = np.full((height, width), -1, dtype=np.int32)
+        if width * height < len(self.grid_tiles):
+            nearby = (self.grid_tiles.get((x, y)) for y in range(top, top + height) for x in range(left, left + width))
+        else:
+            nearby = self.grid_tiles.values()
+        for loc in nearby:
+            if loc and (layer in loc):
                 tile = loc[layer]
-                if tile.group in self.e['Assets'].autotile_config['assignment']:
-                    assignment = self.e['Assets'].autotile_config['assignment'][tile.group]
-                    checks = self.e['Assets'].autotile_config['checks'][assignment]
-                    neighbors = tile.neighbors(checks, handle_edge=True)
-                    for nloc in checks:
-                        if nloc in neighbors:
-                            if neighbors[nloc] == 'edge':
-                                neighbors[nloc] = set(('something', 'self'))
-                            else:
-                                group = neighbors[nloc].group
-                                neighbors[nloc] = set(('something', group))
-                                if group == tile.group:
-                                    neighbors[nloc].add('self')
-                                else:
-                                    neighbors[nloc].add('notself')
-                        else:
-                            neighbors[nloc] = set(('none', 'notself'))
-                    new_type = None
-                    for tile_type, tile_rules in self.e['Assets'].autotile_config['mappings'][assignment].items():
-                        if tile_rules == 'default':
-                            new_type = tile_type
-                            continue
-                        valid = True
-                        for rule in tile_rules:
-                            if rule[2] not in neighbors[tuple(rule[:2])]:
-                                valid = False
-                                break
-                        if valid:
-                            new_type = tile_type
-                    if new_type:
-                        tile.change_id(new_type)
-                        
-    def floodfill(self, tile):
-        check_locs = set((tile.grid_pos,))
-        fill_locs = set()
-        borders = [(1, 0), (0, 1), (-1, 0), (0, -1)]
-        checks = 0
-        while len(check_locs):
-            for loc in check_locs.copy():
-                valid = True
-                if loc in self.grid_tiles:
-                    if tile.layer in self.grid_tiles[loc]:
-                        valid = False
-                if not self.in_map(loc):
+                x = tile.grid_pos[0] - left
+                y = tile.grid_pos[1] - top
+                if (0 <= x < width) and (0 <= y < height):
+                    if tile.group not in group_ids:
+                        group_ids[tile.group] = len(group_ids)
+                    codes[y, x] = group_ids[tile.group]
+        
+        if self.demensional_lock:
+            grid_x = np.arange(left, left + width)
+            grid_y = np.arange(top, top + height)
+            edges = ((grid_x < 0) | (grid_x >= self.dimensions[0]))[np.newaxis, :] | ((grid_y < 0) | (grid_y >= self.dimensions[1]))[:, np.newaxis]
+        else:
+            edges = np.zeros((height, width), dtype=bool)
+        
+        own = codes[ys - top, xs - left]
+        results = table[neighbor_masks(codes, edges, own, xs - left, ys - top, checks)]
+        for tile, result in zip(tiles, results):
+            if result != -1:
+                new_type = tile_types[result]
+                if new_type != tile.tile_id:
+                    tile.change_id(new_type)
+                    self.invalidate(tile.grid_pos)
+        
+    # reference implementation used for assignments that can't be compiled into a lookup table
+    def autotile_tile(self, tile):
+        config = self.e['Assets'].autotile_config
+        assignment = config['assignment'][tile.group]
+        checks = config['checks'][assignment]
+        neighbors = tile.neighbors(checks, handle_edge=True)
+        for nloc in checks:
+            if nloc in neighbors:
+                if neighbors[nloc] == 'edge':
+                    neighbors[nloc] = set(('something', 'self'))
+                else:
+                    group = neighbors[nloc].group
+                    neighbors[nloc] = set(('something', group))
+                    if group == tile.group:
+                        neighbors[nloc].add('self')
+                    else:
+                        neighbors[nloc].add('notself')
+            else:
+                neighbors[nloc] = set(('none', 'notself'))
+        new_type = None
+        for tile_type, tile_rules in config['mappings'][assignment].items():
+            if tile_rules == 'default':
+                new_type = tile_type
+                continue
+            valid = True
+            for rule in tile_rules:
+                if rule[2] not in neighbors[tuple(rule[:2])]:
                     valid = False
-                if valid:
-                    fill_locs.add(loc)
-                    for border in borders:
-                        check_loc = (loc[0] + border[0], loc[1] + border[1])
-                        if check_loc not in fill_locs:
-                            check_locs.add(check_loc)
-                check_locs.remove(loc)
-                checks += 1
-                if len(fill_locs) > 2048:
-                    return
-        for loc in fill_locs:
-            self.insert(tile.shift_clone(loc))
+                    break
+            if valid:
+                new_type = tile_type
+        if new_type:
+            tile.change_id(new_type)
+            self.invalidate(tile.grid_pos)
+                        
+    # returns the filled grid positions as an (N, 2) array or None if the fill would exceed the limit
+    def floodfill(self, tile, limit=2048):
+        locs = self.floodfill_locs(tile.grid_pos, tile.layer, limit=limit)
+        if locs is not None:
+            self.fill(tile, locs)
+        return locs
+    
+    def fill(self, tile, locs):
+        self.insert_many([Tile(tile.group, tile_id=tile.tile_id, pos=loc, layer=tile.layer) for loc in locs.tolist()])
+    
+    def occupancy_rows(self, layer):
+        rows = [bytearray(self.dimensions[0]) for y in range(self.dimensions[1])]
+        for loc, layers in self.grid_tiles.items():
+            if layer in layers:
+                if (0 <= loc[0] < self.dimensions[0]) and (0 <= loc[1] < self.dimensions[1]):
+                    rows[loc[1]][loc[0]] = 1
+        return rows
+    
+    # scanline fill over the empty cells of a layer within the map dimensions
+    def floodfill_locs(self, grid_pos, layer=0, limit=2048):
+        width, height = self.dimensions
+        if not ((0 <= grid_pos[0] < width) and (0 <= grid_pos[1] < height)):
+            return np.zeros((0, 2), dtype=np.int64)
+        rows = self.occupancy_rows(layer)
+        stack = [tuple(grid_pos)]
+        spans = []
+        count = 0
+        while len(stack):
+            x, y = stack.pop()
+            row = rows[y]
+            if row[x]:
+                continue
+            left = row.rfind(1, 0, x) + 1
+            right = row.find(1, x)
+            if right == -1:
+                right = width
+            row[left:right] = b'\x01' * (right - left)
+            count += right - left
+            if (limit != None) and (count > limit):
+                return None
+            spans.append((y, left, right))
+            for ny in (y - 1, y + 1):
+                if 0 <= ny < height:
+                    next_row = rows[ny]
+                    x = left
+                    while x < right:
+                        x = next_row.find(0, x, right)
+                        if x == -1:
+                            break
+                        stack.append((x, ny))
+                        x = next_row.find(1, x, right)
+                        if x == -1:
+                            break
+        locs = np.zeros((count, 2), dtype=np.int64)
+        i = 0
+        for y, left, right in spans:
+            locs[i:i + right - left, 0] = np.arange(left, right)
+            locs[i:i + right - left, 1] = y
+            i += right - left
+        return locs
+        
+    # static layers are pre-composited into one surface per chunk and layer when baking is enabled
+    def set_baking(self, enabled=True, chunk_size=16):
+        self.baked = enabled
+        self.bake_size = chunk_size
+        self.baked_chunks = {}
+        
+    def invalidate(self, grid_pos):
+        self.visible.invalidate(grid_pos)
+        if len(self.baked_chunks):
+            loc = (grid_pos[0] // self.bake_size, grid_pos[1] // self.bake_size)
+            if loc in self.baked_chunks:
+                del self.baked_chunks[loc]
+                
+    def bake_chunk(self, loc):
+        layers = {}
+        dynamic = []
+        for y in range(loc[1] * self.bake_size, (loc[1] + 1) * self.bake_size):
+            for x in range(loc[0] * self.bake_size, (loc[0] + 1) * self.bake_size):
+                if (x, y) in self.grid_tiles:
+                    for tile in self.grid_tiles[(x, y)].values():
+                        # tiles with custom renderers are animated, so they can't be baked
+                        if tile.render_func != basic_tile_render:
+                            dynamic.append(tile)
+                        else:
+                            if tile.layer not in layers:
+                                layers[tile.layer] = []
+                            layers[tile.layer].append(tile)
+        
+        surfs = {}
+        for layer, tiles in layers.items():
+            left = min(tile.raw_pos[0] + tile.offset[0] for tile in tiles)
+            top = min(tile.raw_pos[1] + tile.offset[1] for tile in tiles)
+            right = max(tile.raw_pos[0] + tile.offset[0] + tile.img.get_width() for tile in tiles)
+            bottom = max(tile.raw_pos[1] + tile.offset[1] + tile.img.get_height() for tile in tiles)
+            
+            # colorkeyed tiles can be baked onto a colorkeyed surface, which blits faster than per-pixel alpha
+            colorkeys = set(tile.img.get_colorkey() for tile in tiles)
+            alpha = any(tile.img.get_flags() & pygame.SRCALPHA for tile in tiles)
+            if alpha or (len(colorkeys) != 1) or (None in colorkeys):
+                surf = pygame.Surface((right - left, bottom - top), pygame.SRCALPHA)
+            else:
+                colorkey = colorkeys.pop()
+                surf = pygame.Surface((right - left, bottom - top))
+                surf.fill(colorkey)
+                surf.set_colorkey(colorkey)
+            for tile in tiles:
+                tile.primitive_render(surf, offset=(left, top))
+            surfs[layer] = (surf, (left, top))
+            
+        self.baked_chunks[loc] = (surfs, dynamic)
+        return self.baked_chunks[loc]
+    
+    def renderz_baked(self, rect, offset=(0, 0), group='default'):
+        topleft = (rect.x // self.tile_size[0], rect.y // self.tile_size[1])
+        bottomright = (rect.right // self.tile_size[0], rect.bottom // self.tile_size[1])
+        
+        for y in range(topleft[1] // self.bake_size, bottomright[1] // self.bake_size + 1):
+            for x in range(topleft[0] // self.bake_size, bottomright[0] // self.bake_size + 1):
+                loc = (x, y)
+                if loc in self.baked_chunks:
+                    surfs, dynamic = self.baked_chunks[loc]
+                else:
+                    surfs, dynamic = self.bake_chunk(loc)
+                for layer, (surf, pos) in surfs.items():
+                    self.e['Renderer'].blit(surf, (pos[0] - offset[0], pos[1] - offset[1]), z=layer, group=group)
+                for tile in dynamic:
+                    if (topleft[0] <= tile.grid_pos[0] <= bottomright[0]) and (topleft[1] <= tile.grid_pos[1] <= bottomright[1]):
+                        tile.render(offset=offset, group=group)
+        
+        for tile in self.offgrid_tiles.query(rect):
+            tile.render(offset=offset, group=group)
+    
+    def remove_tile(self, tile):
+        grid_pos = tile.grid_pos
+        if (grid_pos in self.grid_tiles) and (self.grid_tiles[grid_pos].get(tile.layer) == tile):
+            del self.grid_tiles[grid_pos][tile.layer]
+            self.invalidate(grid_pos)
+            if not len(self.grid_tiles[grid_pos]):
+                del self.grid_tiles[grid_pos]
+        if grid_pos in self.physics_map:
+            self.physics_map[grid_pos] = [entry for entry in self.physics_map[grid_pos] if entry[2] != tile]
+            if not len(self.physics_map[grid_pos]):
+                del self.physics_map[grid_pos]
+            self.sync_physics(grid_pos)
         
     # only updates physics map on all layer delete
     def grid_delete(self, grid_pos, layer=None):
         if grid_pos in self.grid_tiles:
+            self.invalidate(grid_pos)
+            self.mark_autotile(grid_pos, list(self.grid_tiles[grid_pos]) if layer == None else [layer])
             if layer == None:
                 del self.grid_tiles[grid_pos]
                 if grid_pos in self.physics_map:
                     del self.physics_map[grid_pos]
+                    self.sync_physics(grid_pos)
             else:
                 if layer in self.grid_tiles[grid_pos]:
                     del self.grid_tiles[grid_pos][layer]
@@ -273,19 +673,23 @@ class Tilemap(Element):
                 if grid_pos in self.grid_tiles:
                     tile_r = pygame.Rect(grid_pos[0] * self.tile_size[0], grid_pos[1] * self.tile_size[1], *self.tile_size)
                     if tile_r.colliderect(rect):
+                        self.invalidate(grid_pos)
+                        self.mark_autotile(grid_pos, list(self.grid_tiles[grid_pos]) if layer == None else [layer])
                         if layer != None:
                             if layer in self.grid_tiles[grid_pos]:
                                 if grid_pos in self.physics_map:
                                     for tile in self.physics_map[grid_pos].copy():
-                                        if tile[1] == self.grid_tiles[grid_pos][layer]:
+                                        if tile[2] == self.grid_tiles[grid_pos][layer]:
                                             self.physics_map[grid_pos].remove(tile)
                                             if not len(self.physics_map[grid_pos]):
                                                 del self.physics_map[grid_pos]
+                                    self.sync_physics(grid_pos)
                                 del self.grid_tiles[grid_pos][layer]
                         else:
                             del self.grid_tiles[grid_pos]
                             if grid_pos in self.physics_map:
                                 del self.physics_map[grid_pos]
+                                self.sync_physics(grid_pos)
                         
         tiles = self.offgrid_tiles.query(rect)
         if layer != None:
@@ -298,6 +702,121 @@ class Tilemap(Element):
                 if tile.rect.colliderect(rect):
                     self.offgrid_tiles.delete(tile)
                 
+    # mirrors the top entry of each physics_map cell in arrays covering the map dimensions to speed up batched queries.
+    # the batched queries also work without it, but then look up each cell in physics_map.
+    def enable_dense_physics(self, enabled=True):
+        self.dense_physics = enabled
+        if enabled:
+            self.build_physics_grid()
+        else:
+            self.physics_grid = None
+            self.physics_tiles = None
+            
+    def build_physics_grid(self):
+        self.physics_grid = np.zeros((self.dimensions[1], self.dimensions[0]), dtype=np.uint8)
+        self.physics_tiles = np.full((self.dimensions[1], self.dimensions[0]), None, dtype=object)
+        for grid_pos in self.physics_map:
+            self.sync_physics(grid_pos)
+            
+    def sync_physics(self, grid_pos):
+        if self.physics_grid is not None:
+            if (0 <= grid_pos[0] < self.dimensions[0]) and (0 <= grid_pos[1] < self.dimensions[1]):
+                if grid_pos in self.physics_map:
+                    tile = self.physics_map[grid_pos][0][2]
+                    self.physics_grid[grid_pos[1], grid_pos[0]] = self.physics_ids[tile.physics_type]
+                    self.physics_tiles[grid_pos[1], grid_pos[0]] = tile
+                else:
+                    self.physics_grid[grid_pos[1], grid_pos[0]] = 0
+                    self.physics_tiles[grid_pos[1], grid_pos[0]] = None
+                    
+    def physics_grid_locs(self, positions):
+        positions = np.asarray(positions)
+        return np.floor_divide(positions[..., 0], self.tile_size[0]).astype(np.int64), np.floor_divide(positions[..., 1], self.tile_size[1]).astype(np.int64)
+    
+    def in_physics_grid(self, grid_x, grid_y):
+        return (grid_x >= 0) & (grid_x < self.dimensions[0]) & (grid_y >= 0) & (grid_y < self.dimensions[1])
+    
+    def sparse_physics_tiles(self, grid_x, grid_y):
+        physics_map = self.physics_map
+        tiles = np.full(grid_x.shape, None, dtype=object)
+        for i, grid_pos in enumerate(zip(grid_x.ravel().tolist(), grid_y.ravel().tolist())):
+            if grid_pos in physics_map:
+                tiles.flat[i] = physics_map[grid_pos][0][2]
+        return tiles
+    
+    def sparse_physics_ids(self, grid_x, grid_y):
+        physics_ids = self.physics_ids
+        return np.array([physics_ids[tile.physics_type] if tile != None else 0 for tile in self.sparse_physics_tiles(grid_x, grid_y).ravel()], dtype=np.uint8).reshape(grid_x.shape)
+    
+    # top physics tile of each grid cell. cells outside the dense grid (or all of them without it) are looked up in physics_map,
+    # since tiles outside the map dimensions exist when demensional_lock is off.
+    def physics_cell_tiles(self, grid_x, grid_y):
+        grid_x = np.asarray(grid_x, dtype=np.int64)
+        grid_y = np.asarray(grid_y, dtype=np.int64)
+        if self.physics_grid is None:
+            return self.sparse_physics_tiles(grid_x, grid_y)
+        valid = self.in_physics_grid(grid_x, grid_y)
+        tiles = self.physics_tiles[np.where(valid, grid_y, 0), np.where(valid, grid_x, 0)]
+        if not valid.all():
+            tiles[~valid] = self.sparse_physics_tiles(grid_x[~valid], grid_y[~valid])
+        return tiles
+    
+    # same as physics_cell_tiles() with physics type IDs (0 for empty)
+    def physics_cell_ids(self, grid_x, grid_y):
+        grid_x = np.asarray(grid_x, dtype=np.int64)
+        grid_y = np.asarray(grid_y, dtype=np.int64)
+        if self.physics_grid is None:
+            return self.sparse_physics_ids(grid_x, grid_y)
+        valid = self.in_physics_grid(grid_x, grid_y)
+        ids = self.physics_grid[np.where(valid, grid_y, 0), np.where(valid, grid_x, 0)]
+        if not valid.all():
+            ids[~valid] = self.sparse_physics_ids(grid_x[~valid], grid_y[~valid])
+        return ids
+    
+    # batched equivalent of physics_gridtile() that returns physics type IDs (0 for empty)
+    def physics_type_ids(self, positions):
+        return self.physics_cell_ids(*self.physics_grid_locs(positions))
+    
+    def physics_tiles_at(self, positions):
+        return self.physics_cell_tiles(*self.physics_grid_locs(positions))
+                
+    # returns (hit pos, tile, normal) for the first physics tile blocking the segment or None
+    # dropthrough platforms only block segments moving down into them
+    def raycast(self, start, end, dropthrough=True):
+        return raycast(self, start, end, dropthrough=dropthrough)
+    
+    # returns (hits, hit positions, normals) arrays. rays that don't hit end at their end point.
+    def raycast_many(self, starts, ends, dropthrough=True):
+        return raycast_many(self, starts, ends, dropthrough=dropthrough)
+    
+    def line_of_sight(self, start, end, dropthrough=False):
+        return not self.raycast(start, end, dropthrough=dropthrough)
+    
+    def line_of_sight_many(self, starts, ends, dropthrough=False):
+        return ~self.raycast_many(starts, ends, dropthrough=dropthrough)[0]
+    
+    # all physics tiles along a segment in order regardless of type
+    def sweep_segment(self, start, end):
+        return sweep_segment(self, start, end)
+    
+    # physics tiles in the cells covered by a box moving from pos - movement to pos
+    def sweep_physics(self, pos, size, movement):
+        left = int(pos[0])
+        right = int(pos[0] - movement[0])
+        if right < left:
+            left, right = right, left
+        top = int(pos[1])
+        bottom = int(pos[1] - movement[1])
+        if bottom < top:
+            top, bottom = bottom, top
+        physics_map = self.physics_map
+        tiles = []
+        for y in range(top // self.tile_size[1], (bottom + size[1] - 1) // self.tile_size[1] + 1):
+            for x in range(left // self.tile_size[0], (right + size[0] - 1) // self.tile_size[0] + 1):
+                if (x, y) in physics_map:
+                    tiles.append(physics_map[(x, y)][0][2])
+        return tiles
+    
     def nearby_grid_physics(self, pos):
         grid_pos = (pos[0] // self.tile_size[0], pos[1] // self.tile_size[1])
         tiles = []
@@ -345,18 +864,10 @@ class Tilemap(Element):
         return tile_types
 
     def render_prep(self, rect, offset=(0, 0), group='default'):
-        topleft = (rect.x // self.tile_size[0], rect.y // self.tile_size[1])
-        bottomright = (rect.right // self.tile_size[0], rect.bottom // self.tile_size[1])
-        layers = {}
-        
-        blits = []
+        self.visible.update(rect)
         
         # grab grid tiles
-        for y in range(topleft[1], bottomright[1] + 1):
-            for x in range(topleft[0], bottomright[0] + 1):
-                tiles = self.gridtile((x, y))
-                for tile in tiles.values():
-                    blits.append((tile.img, (tile.raw_pos[0] + tile.offset[0] - offset[0], tile.raw_pos[1] + tile.offset[1] - offset[1]), tile.layer, group))
+        blits = [(record[2], (record[3] - offset[0], record[4] - offset[1]), record[1], group) for record in self.visible.records()]
                     
         # grab off-grid tiles
         for tile in self.offgrid_tiles.query(rect):
@@ -364,7 +875,27 @@ class Tilemap(Element):
         
         return blits
     
+    # static grid tiles are queued as one batch of blits per layer from the cached visible set
+    def set_view_cache(self, enabled=True):
+        self.view_cache = enabled
+        self.visible.reset()
+        
+    def renderz_cached(self, rect, offset=(0, 0), group='default'):
+        self.visible.update(rect)
+        for layer, blits in self.visible.layer_blits(offset=offset).items():
+            self.e['Renderer'].blits(blits, z=layer, group=group)
+        for tile in self.visible.dynamic_tiles():
+            tile.render(offset=offset, group=group)
+            
+        for tile in self.offgrid_tiles.query(rect):
+            tile.render(offset=offset, group=group)
+    
     def renderz(self, rect, offset=(0, 0), group='default'):
+        if self.baked:
+            return self.renderz_baked(rect, offset=offset, group=group)
+        if self.view_cache:
+            return self.renderz_cached(rect, offset=offset, group=group)
+        
         topleft = (rect.x // self.tile_size[0], rect.y // self.tile_size[1])
         bottomright = (rect.right // self.tile_size[0], rect.bottom // self.tile_size[1])
         layers = {}
@@ -0,0 +1,119 @@
+# keeps world space blit records for the grid tiles in the last requested span
+class VisibleSet:
+    def __init__(self, tilemap, static_render):
+        self.tilemap = tilemap
+        # tiles using any other render function are animated and have to be rendered every frame
+        self.static_render = static_render
+        self.span = None
+        # y -> records in x order. a record is (x, layer, img, world x, world y, tile) where tile is only set for tiles with custom renderers.
+        self.rows = {}
+        # cells are refreshed lazily since edits invalidate before they modify the map
+        self.dirty = set()
+        self.layers = None
+        self.dynamic = None
+        self.offset = None
+        self.output = None
+        
+    def reset(self):
+        self.span = None
+        self.rows = {}
+        self.dirty = set()
+        self.layers = None
+        
+    def cell_records(self, x, y):
+        records = []
+        if (x, y) in self.tilemap.grid_tiles:
+            for tile in self.tilemap.grid_tiles[(x, y)].values():
+                tile_type = tile.tile_type
+                records.append((x, tile.layer, tile_type.img, tile.raw_pos[0] + tile_type.offset[0], tile.raw_pos[1] + tile_type.offset[1], None if tile_type.render_func == self.static_render else tile))
+        return records
+    
+    def row_records(self, y, left, right):
+        records = []
+        for x in range(left, right + 1):
+            records += self.cell_records(x, y)
+        return records
+        
+    def update(self, rect):
+        tile_size = self.tilemap.tile_size
+        span = (rect.x // tile_size[0], rect.y // tile_size[1], rect.right // tile_size[0], rect.bottom // tile_size[1])
+        if span == self.span:
+            self.refresh()
+            return
+        left, top, right, bottom = span
+        if self.span:
+            old_left, old_top, old_right, old_bottom = self.span
+            for y in list(self.rows):
+                if not (top <= y <= bottom):
+                    del self.rows[y]
+            # only the edge columns change for rows that stay in view
+            for y, row in self.rows.items():
+                if (left != old_left) or (right != old_right):
+                    row = [record for record in row if left <= record[0] <= right]
+                    if left < old_left:
+                        row = self.row_records(y, left, min(old_left - 1, right)) + row
+                    if right > old_right:
+                        row += self.row_records(y, max(old_right + 1, left), right)
+                    self.rows[y] = row
+        for y in range(top, bottom + 1):
+            if y not in self.rows:
+                self.rows[y] = self.row_records(y, left, right)
+        self.span = span
+        self.layers = None
+        self.refresh()
+        
+    def invalidate(self, grid_pos):
+        if self.span:
+            left, top, right, bottom = self.span
+            if (left <= grid_pos[0] <= right) and (top <= grid_pos[1] <= bottom):
+                self.dirty.add(tuple(grid_pos))
+                self.layers = None
+                
+    def refresh(self):
+        left, top, right, bottom = self.span
+        for x, y in self.dirty:
+            if (left <= x <= right) and (top <= y <= bottom):
+                row = self.rows[y]
+                self.rows[y] = [record for record in row if record[0] < x] + self.cell_records(x, y) + [record for record in row if record[0] > x]
+        self.dirty = set()
+                
+    def build_layers(self):
+        self.layers = {}
+        self.dynamic = []
+        for y in sorted(self.rows):
+            for record in self.rows[y]:
+                if record[5]:
+                    self.dynamic.append(record[5])
+                else:
+                    if record[1] not in self.layers:
+                        self.layers[record[1]] = []
+                    self.layers[record[1]].append((record[2], record[3], record[4]))
+        self.layers = {layer: self.layers[layer] for layer in sorted(self.layers)}
+        self.output = None
+        
+    # returns {layer: [(img, screen pos), ...]} for the static tiles in z order
+    def layer_blits(self, offset=(0, 0)):
+        if self.layers == None:
+            self.build_layers()
+        offset = tuple(offset)
+        if (self.output == None) or (offset != self.offset):
+            self.output = {layer: [(img, (x - offset[0], y - offset[1])) for img, x, y in records] for layer, records in self.layers.items()}
+            self.offset = offset
+        return self.output
+    
+    # a single list that can be passed directly to Surface.blits()
+    def blits(self, offset=(0, 0)):
+        output = []
+        for layer_blits in self.layer_blits(offset=offset).values():
+            output += layer_blits
+        return output
+    
+    def dynamic_tiles(self):
+        if self.layers == None:
+            self.build_layers()
+        return self.dynamic
+    
+    def records(self):
+        for y in sorted(self.rows):
+            for record in self.rows[y]:
+                yield record
@@ -5,11 +5,13 @@ import pygame
 from ..utils.elements import ElementSingleton, Element
 from ..utils.gfx import palette_swap, clip
 from ..utils.io import recursive_file_op
+from ..assets.cache import cached
+from ..assets.loader import loaded
 
 def load_font_img(path, font_color=(255, 255, 255)):
     fg_color = (255, 0, 0)
     bg_color = (0, 0, 0)
-    font_img = pygame.image.load(path).convert_alpha()
+    font_img = loaded(path, pygame.image.load).convert_alpha()
     font_img = palette_swap(font_img, {fg_color: font_color})
     last_x = 0
     letters = []
@@ -62,7 +64,7 @@ class Font(Element):
     def __init__(self, path, color=(255, 255, 255)):
         super().__init__()
         self.base_color = color
-        self.letters, self.letter_spacing, self.line_height = load_font_img(path, color)
+        self.letters, self.letter_spacing, self.line_height = cached('font:' + path, [path], lambda: load_font_img(path, color), params=color)
         self.color_cache = {color: self.letters}
         self.font_order = ['A','B','C','D','E','F','G','H','I','J','K','L','M','N','O','P','Q','R','S','T','U','V','W','X','Y','Z','a','b','c','d','e','f','g','h','i','j','k','l','m','n','o','p','q','r','s','t','u','v','w','x','y','z','.','-',',',':','+','\'','!','?','0','1','2','3','4','5','6','7','8','9','(',')','/','_','=','\\','[',']','*','"','<','>',';']
         self.font_map = {k: i for i, k in enumerate(self.font_order)}
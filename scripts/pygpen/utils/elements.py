@@ -51,6 +51,9 @@ class Elements:
     def __getitem__(self, key):
         return self.elems['singletons'][key]
     
+    def __contains__(self, key):
+        return key in self.elems['singletons']
+    
     def group(self, key):
         if key in self.elems['duplicates']:
             return self.elems['duplicates'][key]
@@ -1,3 +1,4 @@
+import numpy as np
 import pygame
 
 from ..utils.elements import elems
@@ -31,4 +32,14 @@ def palette_swap(surf, colors):
 
 def smooth_approach(val, target, slowness=1):
     val += (target - val) / slowness * min(elems['Window'].dt, slowness)
-    return val
\ No newline at end of file
+    return val
+
+# RGBA bytes for uploading to a texture with colorkeyed pixels made transparent
+def surface_rgba(surf):
+    data = pygame.image.tobytes(surf, 'RGBA')
+    colorkey = surf.get_colorkey()
+    if colorkey and not (surf.get_flags() & pygame.SRCALPHA):
+        pixels = np.frombuffer(data, dtype=np.uint8).reshape(-1, 4).copy()
+        pixels[(pixels[:, :3] == colorkey[:3]).all(axis=1), 3] = 0
+        data = pixels.tobytes()
+    return data
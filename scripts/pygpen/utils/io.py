@@ -23,11 +23,15 @@ def write_json(path, data):
     json.dump(data, f)
     f.close()
     
+# translation tables for stripping tuple key syntax
+KEY_CHARS = {ord(k): None for k in ' (),t\0'}
+TUPLE_CHARS = {ord(k): None for k in ' ()t\0'}
+
 def tjson_hook(obj):
     if type(obj) == dict:
         for key in list(obj):
-            if (type(key) == str) and (key.translate({ord(k): None for k in ' (),t\0'}).isalnum()) and (key.find(',') != -1) and (key[:2] == 't\0'):
-                new_key = tuple(int(v) for v in key.translate({ord(k): None for k in ' ()t\0'}).split(','))
+            if (type(key) == str) and (key[:2] == 't\0') and (key.find(',') != -1) and (key.translate(KEY_CHARS).isalnum()):
+                new_key = tuple(int(v) for v in key.translate(TUPLE_CHARS).split(','))
                 obj[new_key] = obj[key]
                 del obj[key]
     return obj
@@ -35,8 +39,8 @@ def tjson_hook(obj):
 def tjson_hook_loose(obj):
     if type(obj) == dict:
         for key in list(obj):
-            if (type(key) == str) and (key.translate({ord(k): None for k in ' (),t\0'}).isalnum()) and (key.find(',') != -1):
-                new_key = tuple(int(v) for v in key.translate({ord(k): None for k in ' ()t\0'}).split(','))
+            if (type(key) == str) and (key.find(',') != -1) and (key.translate(KEY_CHARS).isalnum()):
+                new_key = tuple(int(v) for v in key.translate(TUPLE_CHARS).split(','))
                 obj[new_key] = obj[key]
                 del obj[key]
     return obj
@@ -96,4 +100,12 @@ def recursive_file_op(path, func, filetype=None):
             if (asset_type == filetype) or (filetype == None):
                 data_ref[asset.split('.')[0]] = func(f[0] + '/' + asset)
 
-    return data
\ No newline at end of file
+    return data
+
+def directory_files(path, filetype=None):
+    files = []
+    for f in os.walk(path):
+        for asset in f[2]:
+            if (asset.split('.')[-1] == filetype) or (filetype == None):
+                files.append(f[0].replace('\\', '/') + '/' + asset)
+    return sorted(files)
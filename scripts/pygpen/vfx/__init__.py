@@ -1,4 +1,4 @@
-from .particles import Particle, particle_init, particle_behavior
+from .particles import Particle, ParticleSystem, particle_init, particle_behavior, particle_batch_behavior
 from .sparks import Spark
 from .circles import Circle
 from .grass import GrassManager
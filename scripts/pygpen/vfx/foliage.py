@@ -5,6 +5,7 @@ import pygame
 
 from ..utils.elements import ElementSingleton
 from .particles import Particle
+from ..assets.cache import cached
 
 def extract_color(img, color, add_surf=None):
     img = img.copy()
@@ -24,6 +25,19 @@ def extract_color(img, color, add_surf=None):
         return base_surf
     else:
         return surf
+
+def foliage_layers(image, color_chain):
+    layers = []
+    for i, color in enumerate(color_chain[::-1]):
+        if not len(layers):
+            next_layer = extract_color(image, color)
+            if next_layer:
+                layers.append(next_layer)
+        else:
+            next_layer = extract_color(image, color, add_surf=(layers[-1], color_chain[::-1][i - 1]))
+            if next_layer:
+                layers.append(next_layer)
+    return layers[::-1]
     
 class FoliageAssets(ElementSingleton):
     def __init__(self):
@@ -51,39 +65,31 @@ class FoliageAssets(ElementSingleton):
                     wpos = (leaf_point[0] + tile.raw_pos[0], leaf_point[1] + tile.raw_pos[1])
                     colors = {(255, 255, 255): random.choice(leaf_colors[1 if tuple(tile.tile_id) == (0, 2) else 0])}
                     if not tile.map.physics_gridtile(wpos):
-                        leaf = Particle(wpos, 'leaf', velocity=[-15, 15], decay_rate=0.1, advance=random.random() * 0.5, behavior='grass', z=10, colors=colors)
-                        tile.e['EntityGroups'].add(leaf, 'particles')
+                        tile.e['EntityGroups'].spawn(Particle, 'particles', wpos, 'leaf', velocity=[-15, 15], decay_rate=0.1, advance=random.random() * 0.5, behavior='grass', z=10, colors=colors)
                 
         funcs = {f_id: foliage_render for f_id in self.foliage}
         return funcs
         
     def load(self):
-        for ss_id in self.e['Assets'].spritesheets:
-            if 'foliage_colors' in self.e['Assets'].spritesheets[ss_id]['config']:
-                self.foliage[ss_id] = {}
-                colors = self.e['Assets'].spritesheets[ss_id]['config']['foliage_colors']
-                for tile_id in self.e['Assets'].spritesheets[ss_id]['assets']:
-                    motion_scale = self.e['Assets'].spritesheets[ss_id]['config'][tile_id]['motion_scale'] if 'motion_scale' in self.e['Assets'].spritesheets[ss_id]['config'][tile_id] else 1
-                    self.foliage[ss_id][tile_id] = AnimatedFoliage(self.e['Assets'].spritesheets[ss_id]['assets'][tile_id], colors, motion_scale=motion_scale)
+        spritesheets = self.e['Assets'].spritesheets
+        colors = {ss_id: spritesheets[ss_id]['config']['foliage_colors'] for ss_id in spritesheets if 'foliage_colors' in spritesheets[ss_id]['config']}
+        if not len(colors):
+            return
+        build = lambda: {ss_id: {tile_id: foliage_layers(img, colors[ss_id]) for tile_id, img in spritesheets[ss_id]['assets'].items()} for ss_id in colors}
+        sources = [self.e['Assets'].spritesheet_path + '/' + ss_id + '.png' for ss_id in colors]
+        layers = cached('foliage:' + self.e['Assets'].spritesheet_path, sources, build, params=colors)
+        for ss_id in colors:
+            self.foliage[ss_id] = {}
+            for tile_id in spritesheets[ss_id]['assets']:
+                motion_scale = spritesheets[ss_id]['config'][tile_id]['motion_scale'] if 'motion_scale' in spritesheets[ss_id]['config'][tile_id] else 1
+                self.foliage[ss_id][tile_id] = AnimatedFoliage(spritesheets[ss_id]['assets'][tile_id], colors[ss_id], motion_scale=motion_scale, layers=layers[ss_id][tile_id])
 
 class AnimatedFoliage:
-    def __init__(self, image, color_chain, motion_scale=1):
+    def __init__(self, image, color_chain, motion_scale=1, layers=None):
         self.motion_scale = motion_scale
         self.base_image = image.copy()
         self.color_chain = color_chain
-        self.layers = []
-
-        for i, color in enumerate(color_chain[::-1]):
-            if not len(self.layers):
-                next_layer = extract_color(self.base_image, color)
-                if next_layer:
-                    self.layers.append(next_layer)
-            else:
-                next_layer = extract_color(self.base_image, color, add_surf=(self.layers[-1], color_chain[::-1][i - 1]))
-                if next_layer:
-                    self.layers.append(next_layer)
-
-        self.layers = self.layers[::-1]
+        self.layers = layers if layers != None else foliage_layers(self.base_image, color_chain)
 
     def find_leaf_point(self):
         while True:
@@ -77,6 +77,9 @@ from copy import deepcopy
 
 import pygame
 
+from ..assets.cache import cached
+from ..assets.loader import loaded
+
 def normalize(val, amt, target):
     if val > target + amt:
         val -= amt
@@ -190,10 +193,13 @@ class GrassAssets:
         self.blades = []
 
         # load in blade images
-        for blade in sorted(os.listdir(path)):
-            img = pygame.image.load(path + '/' + blade).convert()
-            img.set_colorkey((0, 0, 0))
-            self.blades.append(img)
+        blade_paths = [path + '/' + blade for blade in sorted(os.listdir(path))]
+        self.blades = cached('grass:' + path, blade_paths, lambda: [self.load_blade(blade_path) for blade_path in blade_paths])
+
+    def load_blade(self, path):
+        img = loaded(path, pygame.image.load).convert()
+        img.set_colorkey((0, 0, 0))
+        return img
 
     def render_blade(self, surf, blade_id, location, rotation):
         # rotate the blade
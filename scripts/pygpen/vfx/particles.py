@@ -1,8 +1,10 @@
+import numpy as np
+
 from ..utils.elements import Element
 from ..utils.gfx import palette_swap
 from ..utils.game_math import normalize
 
-PARTICLE_FUNCS = {'behave': {}, 'init': {}}
+PARTICLE_FUNCS = {'behave': {}, 'init': {}, 'batch': {}}
 ANIMATION_CACHE = {}
 
 def particle_init(argument):
@@ -17,6 +19,13 @@ def particle_behavior(argument):
         return func
     return decorator
 
+# vectorized behaviors take the ParticleSystem and operate on its live arrays
+def particle_batch_behavior(argument):
+    def decorator(func):
+        PARTICLE_FUNCS['batch'][argument] = func
+        return func
+    return decorator
+
 @particle_init('idle')
 def idle_init(self):
     pass
@@ -25,6 +34,10 @@ def idle_init(self):
 def idle_behave(self, dt):
     pass
 
+@particle_batch_behavior('idle')
+def idle_batch_behave(system, dt):
+    pass
+
 @particle_init('physics_example')
 def physics_ex_init(self):
     self.acceleration[1] = 600
@@ -35,10 +48,23 @@ def physics_ex_init(self):
 def physics_ex_behave(self, dt):
     pass
 
+@particle_batch_behavior('physics_example')
+def physics_ex_batch_behave(system, dt):
+    pass
+
 class Particle(Element):
     def __init__(self, pos, particle_type, velocity=(0, 0), decay_rate=1.0, advance=0.0, behavior='idle', colors=None, z=0, physics_source=None):
         super().__init__()
-        self.type = particle_type
+        self.type = None
+        self.animation = None
+        self.reuse(pos, particle_type, velocity=velocity, decay_rate=decay_rate, advance=advance, behavior=behavior, colors=colors, z=z, physics_source=physics_source)
+        
+    @staticmethod
+    def pool_key(pos, particle_type, *args, **kwargs):
+        return particle_type
+    
+    # re-initializes the particle in place. the animation is only replaced if the type or palette changed.
+    def reuse(self, pos, particle_type, velocity=(0, 0), decay_rate=1.0, advance=0.0, behavior='idle', colors=None, z=0, physics_source=None):
         self.behavior = behavior
         self.pos = list(pos)
         self.velocity = list(velocity)
@@ -51,17 +77,21 @@ class Particle(Element):
         self.advance = advance
         self.physics_source = physics_source
         self.z = z
-        self.animation = self.e['EntityDB'][self.type].animations[self.type].copy()
-        self.animation.config['loop'] = False
+        if self.animation and (particle_type == self.type) and (colors == self.colors):
+            self.animation.reset()
+        else:
+            self.type = particle_type
+            self.animation = self.e['EntityDB'][self.type].animations[self.type].copy()
+            self.animation.config['loop'] = False
+            if colors:
+                colors_id = (self.type, tuple((tuple(k), tuple(v)) for k, v in colors.items()))
+                if colors_id in ANIMATION_CACHE:
+                    self.animation = ANIMATION_CACHE[colors_id].copy()
+                else:
+                    self.animation = self.animation.hard_copy()
+                    self.animation.palette_swap(colors)
+                    ANIMATION_CACHE[colors_id] = self.animation
         self.colors = colors
-        if colors:
-            colors_id = (self.type, tuple((tuple(k), tuple(v)) for k, v in colors.items()))
-            if colors_id in ANIMATION_CACHE:
-                self.animation = ANIMATION_CACHE[colors_id].copy()
-            else:
-                self.animation = self.animation.hard_copy()
-                self.animation.palette_swap(colors)
-                ANIMATION_CACHE[colors_id] = self.animation
         self.animation.update(advance)
         PARTICLE_FUNCS['init'][behavior](self)
     
@@ -70,6 +100,11 @@ class Particle(Element):
             dt = self.e['Window'].dt
         self.animation.update(dt * self.decay_rate)
         
+        for dt in self.e['Window'].physics_steps(dt):
+            self.step(dt)
+        return self.animation.finished
+    
+    def step(self, dt):
         PARTICLE_FUNCS['behave'][self.behavior](self, dt)
         
         self.next_movement[0] += self.velocity[0] * dt
@@ -102,7 +137,6 @@ class Particle(Element):
         self.velocity[0] = max(-self.velocity_caps[0], min(self.velocity_caps[0], self.velocity[0]))
         self.velocity[1] = max(-self.velocity_caps[1], min(self.velocity_caps[1], self.velocity[1]))
         self.next_movement = [0, 0]
-        return self.animation.finished
     
     def render(self, surf, offset=(0, 0)):
         img = self.animation.img
@@ -110,4 +144,214 @@ class Particle(Element):
     
     def renderz(self, group='default', offset=(0, 0)):
         img = self.animation.img
-        self.e['Renderer'].blit(img, (self.pos[0] - offset[0] - img.get_width() // 2, self.pos[1] - offset[1] - img.get_height() // 2), z=self.z, group=group)
\ No newline at end of file
+        self.e['Renderer'].blit(img, (self.pos[0] - offset[0] - img.get_width() // 2, self.pos[1] - offset[1] - img.get_height() // 2), z=self.z, group=group)
+
+def normalize_array(values, amt):
+    return np.where(values > amt, values - amt, np.where(values < -amt, values + amt, 0))
+
+# stands in for a single particle when running per-particle init and behavior functions on a system
+class ParticleProxy:
+    def __init__(self, system, pos, velocity):
+        self.e = system.e
+        self.type = system.type
+        self.behavior = system.behavior
+        self.pos = list(pos)
+        self.velocity = list(velocity)
+        self.acceleration = [0, 0]
+        self.velocity_caps = [99999, 99999]
+        self.velocity_normalization = [0, 0]
+        self.bounce = system.bounce
+
+# particles of one type and behavior stored as arrays and updated in vectorized passes
+class ParticleSystem(Element):
+    FIELDS = ('pos', 'velocity', 'acceleration', 'velocity_caps', 'velocity_normalization')
+    
+    def __init__(self, particle_type, behavior='idle', colors=None, z=0, physics_source=None, capacity=256):
+        super().__init__()
+        self.type = particle_type
+        self.behavior = behavior
+        self.colors = colors
+        self.z = z
+        self.physics_source = physics_source
+        self.bounce = 0.5
+        self.count = 0
+        
+        animation = self.e['EntityDB'][self.type].animations[self.type]
+        if colors:
+            colors_id = (self.type, tuple((tuple(k), tuple(v)) for k, v in colors.items()))
+            if colors_id not in ANIMATION_CACHE:
+                ANIMATION_CACHE[colors_id] = animation.hard_copy()
+                ANIMATION_CACHE[colors_id].palette_swap(colors)
+            animation = ANIMATION_CACHE[colors_id]
+        self.images = animation.images
+        self.speed = animation.config['speed']
+        durations = [animation.config['frames'][min(i, len(animation.config['frames']) - 1)] for i in range(len(self.images))]
+        self.frame_ends = np.cumsum(durations)
+        self.duration = self.frame_ends[-1]
+        self.image_centers = np.array([(img.get_width() // 2, img.get_height() // 2) for img in self.images], dtype=np.float64)
+        
+        self.capacity = 0
+        self.buffers = {}
+        self.data_buffers = {}
+        self.reserve(capacity)
+        
+    def __len__(self):
+        return self.count
+    
+    def reserve(self, capacity):
+        if capacity <= self.capacity:
+            return
+        for field in self.FIELDS:
+            buffer = np.zeros((capacity, 2))
+            if field in self.buffers:
+                buffer[:self.count] = self.buffers[field][:self.count]
+            self.buffers[field] = buffer
+        for field in ('age', 'decay_rate'):
+            buffer = np.zeros(capacity)
+            if field in self.buffers:
+                buffer[:self.count] = self.buffers[field][:self.count]
+            self.buffers[field] = buffer
+        for field in self.data_buffers:
+            buffer = np.zeros(capacity, dtype=self.data_buffers[field].dtype)
+            buffer[:self.count] = self.data_buffers[field][:self.count]
+            self.data_buffers[field] = buffer
+        self.capacity = capacity
+    
+    # views of the live particles
+    @property
+    def pos(self):
+        return self.buffers['pos'][:self.count]
+    
+    @property
+    def velocity(self):
+        return self.buffers['velocity'][:self.count]
+    
+    @property
+    def acceleration(self):
+        return self.buffers['acceleration'][:self.count]
+    
+    @property
+    def velocity_caps(self):
+        return self.buffers['velocity_caps'][:self.count]
+    
+    @property
+    def velocity_normalization(self):
+        return self.buffers['velocity_normalization'][:self.count]
+    
+    @property
+    def age(self):
+        return self.buffers['age'][:self.count]
+    
+    # per-particle attributes set by init functions (ex: self.time in an init becomes system.data['time'])
+    @property
+    def data(self):
+        return {field: buffer[:self.count] for field, buffer in self.data_buffers.items()}
+    
+    @property
+    def frames(self):
+        return np.minimum(np.searchsorted(self.frame_ends, self.age, side='right'), len(self.images) - 1)
+    
+    def write_proxy(self, i, proxy):
+        for field in self.FIELDS:
+            self.buffers[field][i] = getattr(proxy, field)
+        for field, value in proxy.__dict__.items():
+            if (field not in self.FIELDS) and (field not in {'e', 'type', 'behavior', 'bounce'}):
+                if field not in self.data_buffers:
+                    self.data_buffers[field] = np.zeros(self.capacity, dtype=np.asarray(value).dtype)
+                self.data_buffers[field][i] = value
+                
+    def read_proxy(self, i):
+        proxy = ParticleProxy(self, self.buffers['pos'][i], self.buffers['velocity'][i])
+        for field in self.FIELDS[2:]:
+            setattr(proxy, field, list(self.buffers[field][i]))
+        for field, buffer in self.data_buffers.items():
+            setattr(proxy, field, buffer[i].item())
+        return proxy
+    
+    def add(self, pos, velocity=(0, 0), decay_rate=1.0, advance=0.0):
+        if self.count == self.capacity:
+            self.reserve(self.capacity * 2)
+        i = self.count
+        self.count += 1
+        proxy = ParticleProxy(self, pos, velocity)
+        PARTICLE_FUNCS['init'][self.behavior](proxy)
+        self.write_proxy(i, proxy)
+        self.buffers['age'][i] = advance * self.speed
+        self.buffers['decay_rate'][i] = decay_rate
+        
+    def behave(self, dt):
+        if self.behavior in PARTICLE_FUNCS['batch']:
+            PARTICLE_FUNCS['batch'][self.behavior](self, dt)
+        else:
+            # per-particle fallback for behaviors without a vectorized version
+            for i in range(self.count):
+                proxy = self.read_proxy(i)
+                PARTICLE_FUNCS['behave'][self.behavior](proxy, dt)
+                self.write_proxy(i, proxy)
+    
+    def collide(self, axis, movement):
+        tilemap = self.physics_source
+        if 'solid' not in tilemap.physics_priority:
+            return
+        pos = self.pos
+        hits = tilemap.physics_type_ids(pos) == tilemap.physics_ids['solid']
+        if hits.any():
+            velocity = self.velocity
+            velocity[hits, axis] *= -self.bounce
+            tile_size = tilemap.tile_size[axis]
+            edges = np.floor_divide(pos[hits, axis], tile_size) * tile_size
+            moved = movement[hits]
+            pos[hits, axis] = np.where(moved > 0, edges, np.where(moved < 0, edges + tile_size, pos[hits, axis]))
+    
+    def step(self, dt):
+        self.behave(dt)
+        
+        pos = self.pos
+        velocity = self.velocity
+        movement = velocity * dt
+        
+        # handle movement and tile physics
+        pos[:, 0] += movement[:, 0]
+        if self.physics_source:
+            self.collide(0, movement[:, 0])
+        pos[:, 1] += movement[:, 1]
+        if self.physics_source:
+            self.collide(1, movement[:, 1])
+        
+        velocity += self.acceleration * dt
+        velocity[:] = normalize_array(velocity, self.velocity_normalization * dt)
+        np.clip(velocity, -self.velocity_caps, self.velocity_caps, out=velocity)
+        
+    def cull(self):
+        alive = self.age < self.duration
+        count = int(alive.sum())
+        if count != self.count:
+            for buffers in (self.buffers, self.data_buffers):
+                for field in buffers:
+                    buffers[field][:count] = buffers[field][:self.count][alive]
+            self.count = count
+    
+    def update(self, dt=None):
+        if not dt:
+            dt = self.e['Window'].dt
+        if self.count:
+            self.age[:] += dt * self.buffers['decay_rate'][:self.count] * self.speed
+            for dt in self.e['Window'].physics_steps(dt):
+                self.step(dt)
+            self.cull()
+        # the system lives on in its entity group when empty
+        return False
+    
+    def blits(self, offset=(0, 0)):
+        frames = self.frames
+        positions = self.pos - offset - self.image_centers[frames]
+        images = self.images
+        return [(images[frame], pos) for frame, pos in zip(frames.tolist(), positions.tolist())]
+    
+    def render(self, surf, offset=(0, 0)):
+        if self.count:
+            surf.blits(self.blits(offset=offset), doreturn=False)
+    
+    def renderz(self, group='default', offset=(0, 0)):
+        if self.count:
+            self.e['Renderer'].blits(self.blits(offset=offset), z=self.z, group=group)
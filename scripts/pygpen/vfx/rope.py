@@ -5,12 +5,14 @@ import pygame
 
 from ..utils.game_math import distance
 from ..utils.elements import Element
+from ..misc.timestep import FixedTimestep
 
 class Rope(Element):
     def __init__(self, points, color=(255, 255, 255), hz=60):
         super().__init__()
         self.update_timer = time.time()
         self.hz = hz
+        self.timestep = FixedTimestep(hz)
         self.color = color
         self.points = points
         self.last_points = [[p[0], p[1]] for p in self.points]
@@ -99,10 +101,13 @@ class Rope(Element):
     def update(self, forces=[0, 0.2], restricted=False):
         updates = 1
         if restricted:
-            updates = 0
-            while (self.update_timer + (1 / self.hz)) < self.e['Window'].time:
-                self.update_timer += (1 / self.hz)
-                updates += 1
+            engine_timestep = self.e['Window'].timestep
+            if engine_timestep and (engine_timestep.hz == self.hz):
+                # stays in lockstep with the engine's physics when they run at the same rate
+                updates = engine_timestep.steps
+            else:
+                updates = self.timestep.advance(self.e['Window'].time - self.update_timer)
+            self.update_timer = self.e['Window'].time
         for j in range(updates):
             for i, point in enumerate(self.points):
                 vel = (point[0] - self.last_points[i][0], point[1] - self.last_points[i][1])
@@ -5,6 +5,7 @@ import moderngl
 import pygame
 
 from ..utils.elements import ElementSingleton
+from ..misc.timestep import FixedTimestep
 
 cs = '''
 #version 430
@@ -60,6 +61,7 @@ class WaterManager(ElementSingleton):
         self.springiness = springiness
         self.dampening = dampening
         self.update_timer = time.time()
+        self.timestep = FixedTimestep(hz)
         self.clear()
 
     def render_functions(self, tile_group, spacing=2):
@@ -97,11 +99,14 @@ class WaterManager(ElementSingleton):
         if self.cs_prog:
             updates = 1
             if restricted:
-                updates = 0
-                while (self.update_timer + (1 / self.hz)) < self.e['Window'].time:
-                    self.update_timer += (1 / self.hz)
-                    updates += 1
-            # will attempt to keep up with 60hz in its own time
+                engine_timestep = self.e['Window'].timestep
+                if engine_timestep and (engine_timestep.hz == self.hz):
+                    # stays in lockstep with the engine's physics when they run at the same rate
+                    updates = engine_timestep.steps
+                else:
+                    # will attempt to keep up with its hz in its own time
+                    updates = self.timestep.advance(self.e['Window'].time - self.update_timer)
+                self.update_timer = self.e['Window'].time
             waters = self.compute_buffer + waters
             if len(waters):
                 for i in range(updates):